@@ -1,13 +1,21 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import (
     Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
     Testimonial, TeamMember, PortfolioProject, PortfolioGalleryImage, AboutContent,
-    ContactInfo, ContactFormSubmission, FAQ
+    ContactInfo, ContactFormSubmission, FAQ, MediaJob
 )
 
 
+class SingletonAdmin(admin.ModelAdmin):
+    """Admin for a `SingletonModel`: adding is only offered while no row exists"""
+
+    def has_add_permission(self, request):
+        return super().has_add_permission(request) and not self.model.objects.exists()
+
+
 @admin.register(Navigation)
-class NavigationAdmin(admin.ModelAdmin):
+class NavigationAdmin(SingletonAdmin):
     list_display = ['has_logo', 'created_at', 'updated_at']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -33,7 +41,7 @@ class NavigationAdmin(admin.ModelAdmin):
 
 
 @admin.register(Hero)
-class HeroAdmin(admin.ModelAdmin):
+class HeroAdmin(SingletonAdmin):
     list_display = ['title', 'cta_text', 'has_video', 'has_portrait_video', 'has_image', 'has_logo', 'created_at', 'updated_at']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -284,7 +292,7 @@ class PortfolioGalleryImageAdmin(admin.ModelAdmin):
 
 
 @admin.register(AboutContent)
-class AboutContentAdmin(admin.ModelAdmin):
+class AboutContentAdmin(SingletonAdmin):
     list_display = ['title', 'created_at', 'updated_at']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -314,7 +322,7 @@ class AboutContentAdmin(admin.ModelAdmin):
 
 
 @admin.register(ContactInfo)
-class ContactInfoAdmin(admin.ModelAdmin):
+class ContactInfoAdmin(SingletonAdmin):
     list_display = ['email', 'phone', 'created_at', 'updated_at']
     readonly_fields = ['created_at', 'updated_at']
     
@@ -381,6 +389,44 @@ class FAQAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(MediaJob)
+class MediaJobAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'kind', 'status', 'attempts', 'run_after', 'finished_at']
+    list_filter = ['status', 'kind', 'content_type']
+    readonly_fields = [
+        'content_type', 'object_id', 'field_name', 'source_name', 'kind', 'status',
+        'attempts', 'max_attempts', 'run_after', 'result', 'last_error',
+        'started_at', 'finished_at', 'created_at', 'updated_at'
+    ]
+    actions = ['retry_jobs']
+    
+    fieldsets = (
+        ('Job', {
+            'fields': ('kind', 'content_type', 'object_id', 'field_name', 'source_name')
+        }),
+        ('Status', {
+            'fields': ('status', 'attempts', 'max_attempts', 'run_after', 'started_at', 'finished_at')
+        }),
+        ('Output', {
+            'fields': ('result', 'last_error')
+        }),
+        ('Timestamps', {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Retry selected jobs')
+    def retry_jobs(self, request, queryset):
+        updated = queryset.exclude(status=MediaJob.STATUS_RUNNING).update(
+            status=MediaJob.STATUS_PENDING, attempts=0, run_after=timezone.now()
+        )
+        self.message_user(request, f'{updated} jobs queued for retry.')
+
+
 # Customize admin site
 admin.site.site_header = "Pixel Box Studio Admin"
 admin.site.site_title = "Pixel Box Studio Admin"
@@ -0,0 +1,57 @@
+"""
+Discovery of the GET routes exercised by the benchmark commands.
+"""
+from django.core.management.base import CommandError
+from django.urls import URLPattern, URLResolver, reverse
+
+from content.models import PortfolioProject, ServiceItem
+
+
+# Query strings for routes that need one to do real work
+ROUTE_QUERIES = {
+    'search': 'q=project',
+}
+
+
+def iter_get_routes(patterns):
+    """Yield (name, pattern) for every GET route under `patterns`"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_get_routes(pattern.url_patterns)
+            continue
+        if not isinstance(pattern, URLPattern) or not pattern.name:
+            continue
+        if 'format' in pattern.pattern.regex.groupindex:
+            continue  # format suffix duplicates of the real route
+        actions = getattr(pattern.callback, 'actions', None)
+        view_class = getattr(pattern.callback, 'cls', None)
+        if actions is not None:
+            if 'get' not in actions:
+                continue
+        elif view_class is None or not hasattr(view_class, 'get'):
+            continue
+        yield pattern.name, pattern
+
+
+def route_kwargs(pattern):
+    """Pick real values for the URL kwargs of a route from the seeded data"""
+    kwargs = {}
+    for name in pattern.pattern.regex.groupindex:
+        if name == 'slug':
+            kwargs[name] = PortfolioProject.objects.order_by('pk').values_list('slug', flat=True).first()
+        elif name == 'service_id':
+            kwargs[name] = ServiceItem.objects.order_by('pk').values_list('pk', flat=True).first()
+        elif name == 'pk':
+            model = pattern.callback.cls.queryset.model
+            kwargs[name] = model.objects.order_by('pk').values_list('pk', flat=True).first()
+        else:
+            raise CommandError(f'Do not know how to fill URL kwarg "{name}" for {pattern.name}')
+    return kwargs
+
+
+def route_url(name, pattern):
+    """Return the URL to request for a route, with real kwargs and query string"""
+    url = reverse(name, kwargs=route_kwargs(pattern))
+    if name in ROUTE_QUERIES:
+        url = f'{url}?{ROUTE_QUERIES[name]}'
+    return url
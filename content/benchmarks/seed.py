@@ -0,0 +1,121 @@
+"""
+Synthetic content used by the benchmark commands.
+
+`seed_content(scale)` fills an empty database with `scale` portfolio
+projects (each with a few gallery images), the same number of contact form
+submissions, and a realistic amount of every other content type.
+"""
+from django.db import transaction
+
+from content.models import (
+    Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
+    Testimonial, TeamMember, PortfolioProject, PortfolioGalleryImage, AboutContent,
+    ContactInfo, ContactFormSubmission, FAQ
+)
+from content.search import rebuild_search_index
+from content.tags import rebuild_portfolio_tags
+
+
+BATCH_SIZE = 1000
+GALLERY_IMAGES_PER_PROJECT = 3
+TAGS = ['3D Animation', 'Motion Graphics', 'Branding', 'Web Design', 'Social Media']
+
+
+@transaction.atomic
+def seed_content(scale):
+    """Populate the database with `scale` portfolio projects and submissions"""
+    Navigation.objects.create(menu_links=[
+        {'name': 'Home', 'href': '/'},
+        {'name': 'Services', 'href': '/services'},
+        {'name': 'Portfolio', 'href': '/portfolio'},
+    ])
+    Hero.objects.create(
+        title='Pixel Box Studio',
+        subtitle='Animation and digital marketing',
+        cta_text='Get started',
+        cta_link='https://example.com/contact',
+    )
+    AboutContent.objects.create(
+        title='About us', description='Description', story='Story', vision='Vision',
+        values=['Innovation', 'Quality'],
+    )
+    ContactInfo.objects.create(
+        phone='+91 00000 00000', email='hello@example.com', address='Address',
+        social_links={'instagram': 'https://instagram.com/example'},
+        business_hours={'monday': '9:00 AM - 6:00 PM'},
+    )
+
+    categories = ServiceCategory.objects.bulk_create([
+        ServiceCategory(name=f'Category {i}', description='Category description', order=i)
+        for i in range(5)
+    ])
+    services = ServiceItem.objects.bulk_create([
+        ServiceItem(
+            category=categories[i % len(categories)], title=f'Service {i}',
+            description='Service description', features=['Feature 1', 'Feature 2'],
+            order=i, is_featured=i % 2 == 0,
+        )
+        for i in range(20)
+    ])
+    Feature.objects.bulk_create([
+        Feature(title=f'Feature {i}', description='Feature description', icon='star', order=i)
+        for i in range(6)
+    ])
+    Stat.objects.bulk_create([
+        Stat(title=f'Stat {i}', number=i * 10, suffix='+', order=i)
+        for i in range(7)
+    ])
+    Testimonial.objects.bulk_create([
+        Testimonial(
+            name=f'Customer {i}', role='CEO', company=f'Company {i}', review='Great work',
+            photo='https://example.com/photo.jpg', order=i, is_featured=i % 2 == 0,
+        )
+        for i in range(20)
+    ])
+    TeamMember.objects.bulk_create([
+        TeamMember(
+            name=f'Member {i}', role='Animator', bio='Bio', image='https://example.com/member.jpg',
+            social_links={'linkedin': 'https://linkedin.com/in/example'}, order=i,
+            is_featured=i % 2 == 0,
+        )
+        for i in range(12)
+    ])
+    FAQ.objects.bulk_create([
+        FAQ(question=f'Question {i}?', answer='Answer', order=i, is_featured=i % 2 == 0)
+        for i in range(15)
+    ])
+
+    PortfolioProject.objects.bulk_create([
+        PortfolioProject(
+            title=f'Project {i}', slug=f'project-{i}', description='Project description',
+            detailed_description='Detailed description', challenge='Challenge',
+            solution='Solution', results='Results', media_url='https://example.com/media.jpg',
+            tags=[TAGS[i % len(TAGS)], TAGS[(i + 1) % len(TAGS)]],
+            service=services[i % len(services)], client=f'Client {i % 50}',
+            order=i % 100, is_featured=i % 10 == 0,
+        )
+        for i in range(scale)
+    ], batch_size=BATCH_SIZE)
+    project_ids = list(PortfolioProject.objects.values_list('pk', flat=True))
+    gallery_images = []
+    for project_id in project_ids:
+        for order in range(GALLERY_IMAGES_PER_PROJECT):
+            gallery_images.append(PortfolioGalleryImage(
+                portfolio_project_id=project_id, image_url='https://example.com/gallery.jpg',
+                caption=f'Image {order}', order=order,
+            ))
+        if len(gallery_images) >= BATCH_SIZE:
+            PortfolioGalleryImage.objects.bulk_create(gallery_images)
+            gallery_images = []
+    PortfolioGalleryImage.objects.bulk_create(gallery_images)
+
+    ContactFormSubmission.objects.bulk_create([
+        ContactFormSubmission(
+            name=f'Visitor {i}', email=f'visitor{i}@example.com', subject='Project enquiry',
+            message='Hello, I would like to discuss a project.', is_read=i % 3 == 0,
+        )
+        for i in range(scale)
+    ], batch_size=BATCH_SIZE)
+    # bulk_create skips the signals that maintain the search index and tags
+    rebuild_search_index()
+    rebuild_portfolio_tags()
@@ -0,0 +1,43 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+import math
+from contextlib import contextmanager
+
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def isolated_environment(aliases=('default',)):
+    """
+    Run the body against freshly created test databases and a private
+    in-memory cache, so benchmarks never touch real content or the shared
+    cache. Throttling is off, since every request comes from one client.
+    """
+    setup_test_environment()
+    old_names = []
+    try:
+        for alias in aliases:
+            connection = connections[alias]
+            old_names.append((connection, connection.creation.create_test_db(verbosity=0)))
+        with override_settings(CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        }, API_THROTTLING=False):
+            yield
+    finally:
+        for connection, old_name in old_names:
+            if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+                # SQLite ignores close() on in-memory databases, which would
+                # leave this run's rows in place for the next scale
+                BaseDatabaseWrapper.close(connection)
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(samples)
+    rank = max(int(math.ceil(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[rank]
@@ -0,0 +1,239 @@
+"""
+Model-aware response caching.
+
+`cache_response` marks a viewset action as cached under a fixed key and
+records which models that key depends on. `ResponseCacheMixin` stores the
+final rendered bytes of those actions, already gzip and brotli compressed,
+so a hit does no rendering or compression work. The signal handlers in
+`content.signals` evict every key registered for a model as soon as one of
+its rows is saved or deleted, so cached responses can be kept indefinitely
+without ever going stale; bulk writes call `content_changed_in_bulk`. `model_state` provides the cheap per-model
+validators used for conditional GET, evicted the same way.
+"""
+import atexit
+import gzip
+import hashlib
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .generation import bump_generation
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Model class -> set of cache keys built from that model's rows.
+_dependencies = defaultdict(set)
+
+# Stored encodings, in order of preference
+ENCODINGS = ('br', 'gzip', 'identity') if brotli is not None else ('gzip', 'identity')
+
+
+def register(key, models):
+    """Record that the cache entry `key` is built from rows of `models`"""
+    for model in models:
+        _dependencies[model].add(key)
+
+
+def keys_for_model(model):
+    """Return the cache keys that depend on `model`"""
+    return set(_dependencies.get(model, ()))
+
+
+def _namespace_key(key):
+    return f'{key}:namespace'
+
+
+def _namespace(key):
+    namespace = cache.get(_namespace_key(key))
+    if namespace is None:
+        cache.add(_namespace_key(key), time.time_ns(), None)
+        namespace = cache.get(_namespace_key(key))
+    return namespace
+
+
+def build_cache_key(key, request, kwargs):
+    """
+    Return the concrete cache key for one request.
+
+    Entries live under a namespace that is replaced when `key` is evicted. The
+    namespace is read before the response is built, so a response computed
+    from rows that change mid-request is stored under the old namespace and
+    never served. The scheme and host are part of the variant because the
+    cached bodies hold absolute media URLs built from them.
+    """
+    variant = '&'.join(
+        [request.build_absolute_uri('/')] +
+        [f'{name}={value}' for name, value in sorted(kwargs.items())] +
+        [f'{name}={value}' for name, value in sorted(request.query_params.items())]
+    )
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    return f'{key}:{_namespace(key)}:{digest}'
+
+
+def _state_key(model):
+    return f'model_state:{model._meta.label_lower}'
+
+
+def _changed_key(model):
+    return f'model_changed:{model._meta.label_lower}'
+
+
+def model_state(model):
+    """
+    Return `(row count, last modified)` for a content model.
+
+    The count and MAX(updated_at) are computed with one aggregate query and
+    cached until the model changes. The last modified time also covers
+    deletions, which MAX(updated_at) alone cannot see.
+    """
+    state_key = f'{_state_key(model)}:{_namespace(_state_key(model))}'
+    state = cache.get(state_key)
+    if state is None:
+        aggregates = model._default_manager.aggregate(count=Count('pk'), last_modified=Max('updated_at'))
+        state = (aggregates['count'], aggregates['last_modified'])
+        cache.set(state_key, state, None)
+    count, last_modified = state
+    changed_at = cache.get(_changed_key(model))
+    if changed_at is not None and (last_modified is None or changed_at > last_modified):
+        last_modified = changed_at
+    return count, last_modified
+
+
+def invalidate_model(model):
+    """Evict every cache entry that depends on `model`"""
+    keys = list(keys_for_model(model)) + [_state_key(model)]
+    cache.delete_many([_namespace_key(key) for key in keys])
+    cache.set(_changed_key(model), timezone.now(), None)
+
+
+def content_changed_in_bulk(*models):
+    """
+    Evict the caches of `models` and bump the content generation after a
+    write that skipped the model signals (`update()`, `bulk_create()`,
+    `bulk_update()`), once it is committed.
+    """
+    for model in models:
+        invalidate_model(model)
+    bump_generation()
+
+
+def cache_response(key, depends_on):
+    """
+    Mark a viewset action as cached until one of the `depends_on` models
+    changes. `ResponseCacheMixin` does the caching.
+    """
+    register(key, depends_on)
+
+    def decorator(func):
+        func.response_cache_key = key
+        return func
+    return decorator
+
+
+def negotiate_encoding(request):
+    """Pick the best stored encoding the client accepts"""
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').lower().split(','):
+        coding, *params = [item.strip() for item in part.split(';')]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(coding)
+    for encoding in ENCODINGS:
+        if encoding in accepted:
+            return encoding
+    return 'identity'
+
+
+def encode_content(content):
+    """Return the body in every encoding we serve, compressed once up front"""
+    encoded = {'identity': content, 'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encoded['br'] = brotli.compress(content, quality=11)
+    return encoded
+
+
+def get_cached_response(cache_key, encoding):
+    """Return `(content_type, body)` of one stored encoding, or None"""
+    return cache.get(f'{cache_key}:{encoding}')
+
+
+def set_cached_response(cache_key, content_type, content):
+    """Store every encoding of a rendered body under `cache_key`"""
+    timeout = getattr(settings, 'CONTENT_CACHE_TIMEOUT', None)
+    cache.set_many({
+        f'{cache_key}:{encoding}': (content_type, body)
+        for encoding, body in encode_content(content).items()
+    }, timeout)
+
+
+# Hit/miss counts are collected in process and added to the shared cache at
+# most every STATS_FLUSH_INTERVAL seconds, so a hit costs no extra cache write.
+STATS_FLUSH_INTERVAL = 10
+_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flushed_at = time.monotonic()
+
+
+def _stats_key(key, kind):
+    return f'response_cache_stats:{key}:{kind}'
+
+
+def record_lookup(key, hit):
+    global _stats_flushed_at
+    with _stats_lock:
+        _stats[(key, 'hits' if hit else 'misses')] += 1
+        if time.monotonic() - _stats_flushed_at < STATS_FLUSH_INTERVAL:
+            return
+        _stats_flushed_at = time.monotonic()
+    flush_stats()
+
+
+def flush_stats():
+    """Add this process's pending hit/miss counts to the shared totals"""
+    with _stats_lock:
+        pending = dict(_stats)
+        _stats.clear()
+    for (key, kind), count in pending.items():
+        stats_key = _stats_key(key, kind)
+        if not cache.add(stats_key, count, None):
+            try:
+                cache.incr(stats_key, count)
+            except ValueError:
+                cache.set(stats_key, count, None)
+
+
+def response_cache_stats():
+    """Return `{key: {'hits': n, 'misses': n}}` for every cached endpoint"""
+    flush_stats()
+    keys = sorted({key for model_keys in _dependencies.values() for key in model_keys})
+    totals = cache.get_many([_stats_key(key, kind) for key in keys for kind in ('hits', 'misses')])
+    return {
+        key: {kind: totals.get(_stats_key(key, kind), 0) for kind in ('hits', 'misses')}
+        for key in keys
+    }
+
+
+def reset_response_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+    keys = {key for model_keys in _dependencies.values() for key in model_keys}
+    cache.delete_many([_stats_key(key, kind) for key in keys for kind in ('hits', 'misses')])
+
+
+atexit.register(flush_stats)
@@ -0,0 +1,38 @@
+"""
+Content generation counter.
+
+Every change to a content model bumps a single integer stored in the Django
+cache. Anything that keeps a derived copy of the content in memory (such as
+the site snapshot) compares its own generation against this counter to know
+when it has gone stale.
+"""
+import time
+
+from django.core.cache import cache
+
+
+GENERATION_CACHE_KEY = 'content_generation'
+
+
+def _seed():
+    # Seeding from the clock keeps the counter moving forward even if the
+    # cache entry is evicted and has to be recreated.
+    return time.time_ns() // 1000
+
+
+def get_generation():
+    """Return the current content generation"""
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        cache.add(GENERATION_CACHE_KEY, _seed(), None)
+        generation = cache.get(GENERATION_CACHE_KEY)
+    return generation
+
+
+def bump_generation():
+    """Advance the content generation and return the new value"""
+    try:
+        return cache.incr(GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.add(GENERATION_CACHE_KEY, _seed(), None)
+        return cache.get(GENERATION_CACHE_KEY)
@@ -0,0 +1,150 @@
+"""
+Responsive image derivatives.
+
+Models list their uploaded image fields in `responsive_image_fields`. When one
+of those uploads changes, resized copies are written next to the original at
+each width in `IMAGE_DERIVATIVE_WIDTHS` and in each format of
+`IMAGE_DERIVATIVE_FORMATS` that the installed Pillow can encode (AVIF needs
+Pillow 11.2+ or the pillow-avif-plugin). The generated file names are recorded
+on the row in `image_variants` so serializers can build `srcset` values
+without touching storage.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = [320, 640, 1024, 1600]
+DEFAULT_FORMATS = ['avif', 'webp', 'jpeg']
+DEFAULT_QUALITY = 80
+
+# Format name -> (Pillow format, file extension)
+FORMATS = {
+    'avif': ('AVIF', 'avif'),
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+
+def derivative_widths():
+    return getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', DEFAULT_WIDTHS)
+
+
+def derivative_formats():
+    """Return the configured formats that the installed Pillow can write"""
+    Image.init()
+    formats = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', DEFAULT_FORMATS)
+    return [name for name in formats if name in FORMATS and FORMATS[name][0] in Image.SAVE]
+
+
+def derivative_name(source_name, width, extension):
+    """
+    Name of one derivative of `source_name`. The source extension is kept in
+    the name so `photo.png` and `photo.jpg` never share derivative files.
+    """
+    directory, filename = posixpath.split(source_name)
+    stem, source_extension = posixpath.splitext(filename)
+    if source_extension:
+        stem = f'{stem}-{source_extension[1:].lower()}'
+    return posixpath.join(directory, 'derivatives', f'{stem}-{width}w.{extension}')
+
+
+def _encode(image, pillow_format):
+    if pillow_format == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    buffer = BytesIO()
+    quality = getattr(settings, 'IMAGE_DERIVATIVE_QUALITY', DEFAULT_QUALITY)
+    image.save(buffer, format=pillow_format, quality=quality, optimize=True)
+    return buffer.getvalue()
+
+
+def generate_derivatives(field_file):
+    """
+    Write resized copies of an uploaded image and return its manifest:
+
+        {'source': name, 'width': w, 'height': h,
+         'variants': {format: {width: name}}}
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+
+    # Never upscale; the original width is always offered as the largest size
+    widths = sorted({width for width in derivative_widths() if width < original.width} | {original.width})
+    variants = {}
+    for format_name in derivative_formats():
+        pillow_format, extension = FORMATS[format_name]
+        variants[format_name] = {}
+        for width in widths:
+            resized = original.copy()
+            resized.thumbnail((width, original.height), Image.LANCZOS)
+            name = derivative_name(field_file.name, width, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(_encode(resized, pillow_format)))
+            variants[format_name][str(width)] = name
+    return {
+        'source': field_file.name,
+        'width': original.width,
+        'height': original.height,
+        'variants': variants,
+    }
+
+
+def delete_derivatives(storage, manifest):
+    """Remove the files listed in a derivative manifest"""
+    for names in manifest.get('variants', {}).values():
+        for name in names.values():
+            storage.delete(name)
+
+
+def stale_image_fields(instance):
+    """Return the responsive image fields whose derivatives are out of date"""
+    manifests = getattr(instance, 'image_variants', None) or {}
+    stale = []
+    for field_name in getattr(instance, 'responsive_image_fields', ()):
+        field_file = getattr(instance, field_name)
+        manifest = manifests.get(field_name)
+        if manifest is None:
+            if field_file:
+                stale.append(field_name)
+        elif not field_file or manifest.get('source') != field_file.name:
+            stale.append(field_name)
+    return stale
+
+
+def refresh_image_variants(instance, field_names=None, force=False):
+    """
+    Bring `instance.image_variants` in line with its uploaded images.
+
+    Only `field_names` are considered when given. Returns True when the
+    manifest changed. The caller is responsible for persisting it.
+    """
+    manifests = dict(instance.image_variants or {})
+    changed = False
+    for field_name in field_names or instance.responsive_image_fields:
+        field_file = getattr(instance, field_name)
+        manifest = manifests.get(field_name)
+        if manifest and (force or not field_file or manifest.get('source') != field_file.name):
+            delete_derivatives(field_file.storage, manifest)
+            del manifests[field_name]
+            changed = True
+        if field_file and field_name not in manifests:
+            try:
+                manifests[field_name] = generate_derivatives(field_file)
+            except OSError:
+                logger.warning('Could not generate derivatives for %s', field_file.name, exc_info=True)
+                continue
+            changed = True
+    if changed:
+        instance.image_variants = manifests
+    return changed
@@ -0,0 +1,266 @@
+"""
+Bulk content import.
+
+`import_bundle` applies a bundle (a dict loaded from JSON or YAML, see
+`load_bundle`) of content sections to the database. Each list section is
+matched against the existing rows by its natural key; only new and changed
+rows are written, with one `bulk_create` and one `bulk_update` per section,
+and the whole import runs in one transaction. Singleton sections (navigation,
+hero, about, contact_info) hold a single object instead of a list.
+
+Relations are written as the natural key of the related row, e.g.
+`category: Digital Marketing` on a service or `service: 3D Animation` on a
+portfolio project. Sections are applied in dependency order, so a bundle
+can create a category and its services together.
+
+Bulk writes skip the model signals, so the import does their work itself:
+it allocates portfolio slugs, refreshes the search index and portfolio
+tags, and evicts the caches of every model it changed.
+"""
+import json
+from collections import namedtuple
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
+
+from .cache import content_changed_in_bulk
+from .models import (
+    Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
+    Testimonial, TeamMember, PortfolioProject, AboutContent, ContactInfo, FAQ
+)
+from .search import index_objects, is_searchable
+from .slugs import assign_slugs
+from .tags import rebuild_portfolio_tags
+
+try:
+    import yaml
+    YAMLLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+except ImportError:  # pragma: no cover
+    yaml = None
+
+
+BATCH_SIZE = 1000
+
+# `key` lists the natural key fields (empty for singletons); `relations`
+# maps foreign keys to the (model, field) their bundle values refer to.
+Section = namedtuple('Section', ['name', 'model', 'key', 'relations'])
+
+# In dependency order
+SECTIONS = (
+    Section('navigation', Navigation, (), {}),
+    Section('hero', Hero, (), {}),
+    Section('service_categories', ServiceCategory, ('name',), {}),
+    Section('services', ServiceItem, ('category', 'title'), {'category': (ServiceCategory, 'name')}),
+    Section('features', Feature, ('title',), {}),
+    Section('stats', Stat, ('title',), {}),
+    Section('testimonials', Testimonial, ('name', 'company'), {}),
+    Section('team', TeamMember, ('name',), {}),
+    Section('portfolio', PortfolioProject, ('title',), {'service': (ServiceItem, 'title')}),
+    Section('about', AboutContent, (), {}),
+    Section('contact_info', ContactInfo, (), {}),
+    Section('faqs', FAQ, ('question',), {}),
+)
+
+SectionReport = namedtuple('SectionReport', ['name', 'created', 'updated', 'unchanged', 'deleted'])
+
+
+class BundleError(Exception):
+    """The bundle cannot be imported; nothing has been written"""
+
+
+def load_bundle(path):
+    """Read a JSON or YAML bundle file"""
+    path = Path(path)
+    try:
+        text = path.read_text(encoding='utf-8')
+    except OSError as exc:
+        raise BundleError(f'Cannot read {path}: {exc}')
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        if yaml is None:
+            raise BundleError('Reading YAML bundles needs the PyYAML package')
+        try:
+            # libyaml's loader, when PyYAML was built with it, is several times faster
+            bundle = yaml.load(text, Loader=YAMLLoader)
+        except yaml.YAMLError as exc:
+            raise BundleError(f'Invalid YAML in {path}: {exc}')
+    else:
+        try:
+            bundle = json.loads(text)
+        except ValueError as exc:
+            raise BundleError(f'Invalid JSON in {path}: {exc}')
+    if not isinstance(bundle, dict):
+        raise BundleError('A bundle must be a mapping of section names to content')
+    return bundle
+
+
+def importable_fields(model):
+    """Fields a bundle may set: editable, non-upload concrete fields"""
+    return {
+        field.name: field for field in model._meta.concrete_fields
+        if field.editable and not field.primary_key and not isinstance(field, models.FileField)
+    }
+
+
+def _natural_keys(model, field_name):
+    """Return `{natural key value: pk}`, with None for ambiguous values"""
+    keys = {}
+    for value, pk in model._default_manager.values_list(field_name, 'pk'):
+        keys[value] = None if value in keys else pk
+    return keys
+
+
+def _instance_key(section, instance):
+    return tuple(
+        getattr(instance, instance._meta.get_field(name).attname) for name in section.key
+    )
+
+
+def _row_values(section, fields, natural_keys, index, row):
+    """Convert one bundle row to `{field name: python value}`"""
+    where = f'{section.name}[{index}]' if section.key else section.name
+    if not isinstance(row, dict):
+        raise BundleError(f'{where}: expected a mapping of field names to values')
+    unknown = sorted(set(row) - set(fields))
+    if unknown:
+        raise BundleError(f'{where}: unknown field(s) {", ".join(unknown)}')
+    missing = [name for name in section.key if name not in row]
+    if missing:
+        raise BundleError(f'{where}: missing natural key field(s) {", ".join(missing)}')
+
+    values = {}
+    for name, value in row.items():
+        field = fields[name]
+        if name in section.relations:
+            if value is not None:
+                pk = natural_keys[name].get(value, 0)
+                if not pk:
+                    problem = 'matches several rows' if pk is None else 'does not exist'
+                    related_model = section.relations[name][0]
+                    raise BundleError(f'{where}.{name}: {related_model._meta.verbose_name} "{value}" {problem}')
+                value = pk
+        else:
+            try:
+                value = field.to_python(value)
+            except ValidationError as exc:
+                raise BundleError(f'{where}.{name}: {" ".join(exc.messages)}')
+        values[field.attname] = value
+    return where, values
+
+
+def _import_section(section, rows, prune, now):
+    """Diff one section against the database and write the changes"""
+    model = section.model
+    if not section.key:
+        rows = [rows]
+    if not isinstance(rows, list):
+        raise BundleError(f'{section.name}: expected a list of rows')
+
+    fields = importable_fields(model)
+    natural_keys = {
+        name: _natural_keys(related_model, lookup) for name, (related_model, lookup) in section.relations.items()
+    }
+
+    existing, ambiguous = {}, {}
+    for instance in model._default_manager.all():
+        key = _instance_key(section, instance)
+        if key in existing:
+            ambiguous[key] = ambiguous.get(key, 1) + 1
+        existing[key] = instance
+    if prune and ambiguous:
+        # The rows shadowed by a duplicate key could never be matched or pruned
+        key, count = next(iter(ambiguous.items()))
+        raise BundleError(
+            f'{section.name}: cannot prune, {count} existing rows share the {"/".join(section.key)} {key}'
+        )
+    seen, created, updated, unchanged = set(), [], [], []
+    changed_fields = set()
+    for index, row in enumerate(rows):
+        where, values = _row_values(section, fields, natural_keys, index, row)
+        key = tuple(values[model._meta.get_field(name).attname] for name in section.key)
+        if key in seen:
+            raise BundleError(f'{where}: duplicate {"/".join(section.key)} {key}')
+        seen.add(key)
+
+        if key in ambiguous:
+            raise BundleError(
+                f'{where}: {"/".join(section.key)} {key} matches {ambiguous[key]} existing rows'
+            )
+        instance = existing.get(key)
+        if instance is None:
+            instance = model(**values)
+            exclude = list(section.relations)
+            created.append(instance)
+        else:
+            changes = [name for name, value in values.items() if getattr(instance, name) != value]
+            if not changes:
+                unchanged.append(instance)
+                continue
+            for name in changes:
+                setattr(instance, name, values[name])
+            instance.updated_at = now
+            changed_fields.update(changes)
+            exclude = [field.name for field in model._meta.fields if field.attname not in changes]
+            exclude += list(section.relations)
+            updated.append((instance, [model._meta.get_field(name).name for name in changes]))
+        try:
+            instance.clean_fields(exclude=exclude)
+        except ValidationError as exc:
+            messages = '; '.join(f'{name}: {" ".join(errors)}' for name, errors in exc.message_dict.items())
+            raise BundleError(f'{where}: {messages}')
+
+    if model is PortfolioProject:
+        assign_slugs(created)
+    model._default_manager.bulk_create(created, batch_size=BATCH_SIZE)
+    if updated:
+        model._default_manager.bulk_update(
+            [instance for instance, _ in updated], sorted(changed_fields | {'updated_at'}), batch_size=BATCH_SIZE
+        )
+
+    deleted = []
+    if prune and section.key:
+        deleted = [instance for key, instance in existing.items() if key not in seen]
+        model._default_manager.filter(pk__in=[instance.pk for instance in deleted]).delete()
+
+    return SectionReport(
+        name=section.name,
+        created=created,
+        updated=updated,
+        unchanged=unchanged,
+        deleted=deleted,
+    )
+
+
+def import_bundle(bundle, prune=False, dry_run=False):
+    """
+    Apply `bundle` in one transaction and return a `SectionReport` per
+    section. With `prune`, rows of the imported list sections that are not
+    in the bundle are deleted. With `dry_run` the transaction is rolled back.
+    """
+    unknown = sorted(set(bundle) - {section.name for section in SECTIONS})
+    if unknown:
+        raise BundleError(f'Unknown section(s) {", ".join(unknown)}')
+
+    now = timezone.now()
+    reports, changed_models = [], set()
+    with transaction.atomic():
+        for section in SECTIONS:
+            if section.name not in bundle:
+                continue
+            report = _import_section(section, bundle[section.name], prune, now)
+            reports.append(report)
+            if report.created or report.updated or report.deleted:
+                changed_models.add(section.model)
+                if is_searchable(section.model):
+                    pks = [instance.pk for instance in report.created]
+                    pks += [instance.pk for instance, _ in report.updated]
+                    index_objects(section.model, pks)
+        if PortfolioProject in changed_models:
+            rebuild_portfolio_tags()
+        if dry_run:
+            transaction.set_rollback(True)
+
+    if changed_models and not dry_run:
+        content_changed_in_bulk(*changed_models)
+    return reports
@@ -0,0 +1,97 @@
+import copy
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from content.benchmarks.utils import percentile
+
+
+MODES = ('per-request', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-request database connection overhead of the configured '
+        'database with new connections per request, persistent connections and '
+        'a connection pool (PostgreSQL only)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Simulated requests per mode'
+        )
+        parser.add_argument(
+            '--mode', choices=MODES, nargs='+', default=list(MODES),
+            help='Connection handling modes to compare'
+        )
+
+    def handle(self, *args, **options):
+        modes = options['mode']
+        if connection.vendor != 'postgresql' and 'pool' in modes:
+            self.stdout.write(self.style.WARNING('Connection pooling needs PostgreSQL, skipping the pool mode'))
+            modes = [mode for mode in modes if mode != 'pool']
+
+        self.stdout.write(f'Database: {connection.vendor} {connection.settings_dict["NAME"]}')
+        original = copy.deepcopy(connection.settings_dict)
+        created = []
+
+        def count_connection(sender, connection, **kwargs):
+            created.append(connection.alias)
+
+        connection_created.connect(count_connection)
+        try:
+            for mode in modes:
+                self.configure(mode, original)
+                created.clear()
+                timings = self.run_requests(options['requests'])
+                self.stdout.write(
+                    f'  {mode:12} {len(created):5} connections opened  '
+                    f'mean {sum(timings) / len(timings):7.3f}ms  '
+                    f'p50 {percentile(timings, 50):7.3f}ms  p95 {percentile(timings, 95):7.3f}ms'
+                )
+        finally:
+            connection_created.disconnect(count_connection)
+            self.configure(None, original)
+
+    def configure(self, mode, original):
+        """Reconnect the default database using the given connection handling"""
+        connection.close()
+        if connection.vendor == 'postgresql' and connection.pool is not None:
+            connection.close_pool()
+        connection.settings_dict.clear()
+        connection.settings_dict.update(copy.deepcopy(original))
+        if mode is None:
+            return
+        options = connection.settings_dict['OPTIONS']
+        options.pop('pool', None)
+        if mode == 'per-request':
+            connection.settings_dict['CONN_MAX_AGE'] = 0
+            connection.settings_dict['CONN_HEALTH_CHECKS'] = False
+        elif mode == 'persistent':
+            connection.settings_dict['CONN_MAX_AGE'] = original['CONN_MAX_AGE'] or 600
+            connection.settings_dict['CONN_HEALTH_CHECKS'] = True
+        elif mode == 'pool':
+            connection.settings_dict['CONN_MAX_AGE'] = 0
+            options['pool'] = original['OPTIONS'].get('pool') or True
+        else:
+            raise CommandError(f'Unknown mode "{mode}"')
+
+    def run_requests(self, count):
+        """
+        Run `count` request cycles of one trivial query each. The request
+        signals close (or recycle) the connection exactly as under gunicorn.
+        """
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+            request_finished.send(sender=self.__class__)
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
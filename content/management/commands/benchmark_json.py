@@ -0,0 +1,74 @@
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from content.benchmarks.seed import seed_content
+from content.benchmarks.utils import isolated_environment, percentile
+from content.models import PortfolioProject
+from content.parsers import FastJSONParser
+from content.renderers import FastJSONRenderer, orjson
+from content.serializers import PortfolioProjectSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the stock and orjson based JSON renderer/parser on real '
+        'PortfolioProjectSerializer output'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--projects', type=int, default=100,
+            help='Portfolio projects (with gallery images) in the rendered payload'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=200,
+            help='Timed renders/parses per implementation'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed, FastJSONRenderer falls back to JSONRenderer'))
+
+        with isolated_environment():
+            seed_content(options['projects'])
+            request = RequestFactory().get('/api/portfolio/')
+            queryset = PortfolioProject.objects.select_related('service').prefetch_related('gallery_images')
+            data = PortfolioProjectSerializer(queryset, many=True, context={'request': request}).data
+
+        stock, fast = JSONRenderer().render(data), FastJSONRenderer().render(data)
+        if json.loads(stock) != json.loads(fast):
+            raise CommandError('FastJSONRenderer output differs from JSONRenderer')
+        self.stdout.write(
+            f'{len(data)} projects, {len(stock)} bytes '
+            f'({"byte-identical" if stock == fast else "equivalent"} output)'
+        )
+
+        results = {}
+        for label, renderer, parser in (
+            ('stock', JSONRenderer(), JSONParser()),
+            ('orjson', FastJSONRenderer(), FastJSONParser()),
+        ):
+            render = self.time(options['iterations'], lambda: renderer.render(data))
+            parse = self.time(options['iterations'], lambda: parser.parse(io.BytesIO(stock)))
+            results[label] = render, parse
+            self.stdout.write(
+                f'  {label:7} render p50 {percentile(render, 50):7.3f}ms  p95 {percentile(render, 95):7.3f}ms  '
+                f'parse p50 {percentile(parse, 50):7.3f}ms  p95 {percentile(parse, 95):7.3f}ms'
+            )
+        for index, operation in enumerate(('render', 'parse')):
+            speedup = percentile(results['stock'][index], 50) / percentile(results['orjson'][index], 50)
+            self.stdout.write(f'  {operation} speedup {speedup:.1f}x')
+
+    def time(self, iterations, func):
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return timings
@@ -0,0 +1,147 @@
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+
+from content import urls as content_urls
+from content.benchmarks.routes import iter_get_routes, route_url
+from content.benchmarks.seed import seed_content
+from content.benchmarks.utils import isolated_environment, percentile
+
+
+DEFAULT_BASELINE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'route_baseline.json'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every content API route and compare against a stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, nargs='+', default=[10],
+            help='Number of portfolio projects/submissions to seed (one run per value)'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Timed requests per route'
+        )
+        parser.add_argument(
+            '--baseline', default=str(DEFAULT_BASELINE),
+            help='Path of the baseline JSON file'
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help='Store the results as the new baseline instead of comparing'
+        )
+        parser.add_argument(
+            '--latency-tolerance', type=float, default=1.0,
+            help='Allowed relative p95 latency increase (1.0 = +100%%)'
+        )
+        parser.add_argument(
+            '--latency-slack-ms', type=float, default=5.0,
+            help='Absolute p95 latency increase always tolerated, in milliseconds'
+        )
+        parser.add_argument(
+            '--size-tolerance', type=float, default=0.1,
+            help='Allowed relative response size increase (0.1 = +10%%)'
+        )
+
+    def handle(self, *args, **options):
+        results = {}
+        for scale in options['scale']:
+            self.stdout.write(f'Benchmarking routes with {scale} portfolio projects...')
+            with isolated_environment():
+                seed_content(scale)
+                results[str(scale)] = self.run_routes(options['iterations'])
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline = self.load_baseline(baseline_path)
+            baseline.update(results)
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+            return
+
+        regressions = self.compare(results, self.load_baseline(baseline_path), options)
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            raise CommandError(f'{len(regressions)} route regression(s) against {baseline_path}')
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def run_routes(self, iterations):
+        client = Client()
+        results = {}
+        for name, pattern in iter_get_routes(content_urls.urlpatterns):
+            url = route_url(name, pattern)
+
+            # Cold request: nothing cached, so the query count is the real cost
+            cache.clear()
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            query_count = len(queries)
+            if response.status_code >= 500:
+                raise CommandError(f'{url} returned {response.status_code}')
+
+            timings = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            results[name] = {
+                'url': url,
+                'status': response.status_code,
+                'queries': query_count,
+                'bytes': len(response.content),
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+            }
+            self.stdout.write(
+                f'  {name:40} {results[name]["queries"]:3} queries  '
+                f'{results[name]["bytes"]:8} bytes  p50 {results[name]["p50_ms"]:8.2f}ms  '
+                f'p95 {results[name]["p95_ms"]:8.2f}ms'
+            )
+        return results
+
+    def load_baseline(self, path):
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text())
+
+    def compare(self, results, baseline, options):
+        regressions = []
+        for scale, routes in results.items():
+            # An unrecorded scale or route would pass unchecked: record it
+            # with --update-baseline instead
+            if scale not in baseline:
+                regressions.append(f'[{scale}] no baseline recorded for this scale')
+                continue
+            for name, current in routes.items():
+                previous = baseline[scale].get(name)
+                if previous is None:
+                    regressions.append(f'[{scale}] {name}: no baseline recorded for this route')
+                    continue
+                if current['queries'] > previous['queries']:
+                    regressions.append(
+                        f'[{scale}] {name}: {current["queries"]} queries (baseline {previous["queries"]})'
+                    )
+                if current['bytes'] > previous['bytes'] * (1 + options['size_tolerance']):
+                    regressions.append(
+                        f'[{scale}] {name}: {current["bytes"]} bytes (baseline {previous["bytes"]})'
+                    )
+                allowed_ms = (
+                    previous['p95_ms'] * (1 + options['latency_tolerance']) + options['latency_slack_ms']
+                )
+                if current['p95_ms'] > allowed_ms:
+                    regressions.append(
+                        f'[{scale}] {name}: p95 {current["p95_ms"]}ms (baseline {previous["p95_ms"]}ms)'
+                    )
+        return regressions
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from content.spool import BATCH_SIZE, flush_spool, pending_submissions
+
+
+class Command(BaseCommand):
+    help = 'Write buffered contact form submissions from the spool to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds between flushes'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Submissions written per transaction'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Flush the spool once and exit'
+        )
+
+    def handle(self, *args, **options):
+        if not options['once']:
+            self.stdout.write(f'Contact spool flusher started, flushing every {options["interval"]}s')
+
+        while True:
+            written = flush_spool(options['batch_size'])
+            if written:
+                self.stdout.write(self.style.SUCCESS(f'Saved {written} contact form submissions'))
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        pending = pending_submissions()
+        if pending:
+            self.stdout.write(self.style.WARNING(f'{pending} submissions arrived during the flush'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Contact spool is empty'))
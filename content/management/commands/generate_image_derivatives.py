@@ -0,0 +1,39 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from content.cache import content_changed_in_bulk
+from content.images import refresh_image_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive image derivatives for existing uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate derivatives even if they are already up to date'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Generating image derivatives...')
+        updated_count = 0
+        updated_models = set()
+
+        for model in apps.get_app_config('content').get_models():
+            if not getattr(model, 'responsive_image_fields', None):
+                continue
+            for instance in model.objects.all():
+                if refresh_image_variants(instance, force=options['force']):
+                    # Update without triggering save signals
+                    model.objects.filter(pk=instance.pk).update(image_variants=instance.image_variants)
+                    updated_count += 1
+                    updated_models.add(model)
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Generated derivatives for {model._meta.verbose_name} "{instance}"')
+                    )
+
+        if updated_models:
+            content_changed_in_bulk(*updated_models)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'\nSuccessfully updated {updated_count} rows!')
+        )
@@ -1,6 +1,12 @@
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
+from django.db import transaction
+from django.db.models import Q
+from content.cache import content_changed_in_bulk
 from content.models import PortfolioProject
+from content.slugs import assign_slugs
+
+
+BATCH_SIZE = 1000
 
 
 class Command(BaseCommand):
@@ -9,30 +15,23 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         self.stdout.write('Generating slugs for existing portfolio projects...')
         
-        projects = PortfolioProject.objects.all()
-        updated_count = 0
+        # One read of the taken slugs and batched updates, all in one
+        # transaction so a concurrent save cannot take a slug in between
+        # (on PostgreSQL the unique constraint rolls the whole run back)
+        with transaction.atomic():
+            projects = assign_slugs(
+                PortfolioProject.objects.filter(Q(slug__isnull=True) | Q(slug='')).only('pk', 'title', 'slug')
+            )
+            PortfolioProject.objects.bulk_update(projects, ['slug'], batch_size=BATCH_SIZE)
+        
+        if projects:
+            content_changed_in_bulk(PortfolioProject)
         
         for project in projects:
-            if not project.slug:
-                base_slug = slugify(project.title)
-                slug = base_slug
-                counter = 1
-                
-                # Ensure unique slug
-                while PortfolioProject.objects.filter(slug=slug).exclude(pk=project.pk).exists():
-                    slug = f"{base_slug}-{counter}"
-                    counter += 1
-                
-                # Update without triggering save method to avoid recursion
-                PortfolioProject.objects.filter(pk=project.pk).update(slug=slug)
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Generated slug "{slug}" for "{project.title}"')
-                )
+            self.stdout.write(
+                self.style.SUCCESS(f'Generated slug "{project.slug}" for "{project.title}"')
+            )
         
         self.stdout.write(
-            self.style.SUCCESS(f'\nSuccessfully generated {updated_count} slugs!')
+            self.style.SUCCESS(f'\nSuccessfully generated {len(projects)} slugs!')
         )
-
-
-
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from content.importer import BundleError, SECTIONS, import_bundle, load_bundle
+
+
+class Command(BaseCommand):
+    help = (
+        'Import a JSON or YAML content bundle, creating and updating rows matched '
+        'by natural key in a single transaction. Sections: '
+        + ', '.join(section.name for section in SECTIONS)
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Bundle file (.json, .yaml or .yml)')
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete rows of the imported sections that are not in the bundle'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report the changes without writing them'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            reports = import_bundle(load_bundle(options['file']), prune=options['prune'], dry_run=options['dry_run'])
+        except BundleError as exc:
+            raise CommandError(str(exc))
+
+        for report in reports:
+            self.stdout.write(
+                f'{report.name}: {len(report.created)} created, {len(report.updated)} updated, '
+                f'{len(report.unchanged)} unchanged, {len(report.deleted)} deleted'
+            )
+            for instance in report.created:
+                self.stdout.write(self.style.SUCCESS(f'  + {instance}'))
+            for instance, changes in report.updated:
+                self.stdout.write(self.style.WARNING(f'  ~ {instance} ({", ".join(changes)})'))
+            for instance in report.deleted:
+                self.stdout.write(self.style.ERROR(f'  - {instance}'))
+
+        elapsed = time.perf_counter() - start
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Dry run, nothing was written ({elapsed:.2f}s)'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Import finished in {elapsed:.2f}s'))
@@ -0,0 +1,106 @@
+import re
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from content import urls as content_urls
+from content.benchmarks.routes import iter_get_routes, route_url
+from content.benchmarks.seed import seed_content
+from content.benchmarks.utils import isolated_environment
+
+
+# EXPLAIN output patterns per backend: (full table scan, sort without index)
+SCAN_PATTERNS = {
+    'sqlite': (re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$'), re.compile(r'USE TEMP B-TREE FOR (ORDER BY|GROUP BY|DISTINCT)')),
+    'postgresql': (re.compile(r'Seq Scan on (\w+)'), re.compile(r'^\s*(?:->\s*)?(Sort|Incremental Sort)\b')),
+}
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the queries behind every content API route and flag full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1000,
+            help='Number of portfolio projects/submissions to seed'
+        )
+        parser.add_argument(
+            '--min-rows', type=int, default=100,
+            help='Ignore scans of tables with fewer rows than this'
+        )
+        parser.add_argument(
+            '--fail-on-scan', action='store_true',
+            help='Exit with an error when any full scan is found'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SCAN_PATTERNS:
+            raise CommandError(f'EXPLAIN parsing is not implemented for {connection.vendor}')
+        self.scan_pattern, self.sort_pattern = SCAN_PATTERNS[connection.vendor]
+
+        with isolated_environment():
+            seed_content(options['scale'])
+            self.row_counts = {}
+            self.tables = set(connection.introspection.table_names())
+            scans = self.report(options['min_rows'])
+
+        if scans:
+            message = f'{scans} full table scan(s) found'
+            if options['fail_on_scan']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('No full table scans found'))
+
+    def report(self, min_rows):
+        client = Client()
+        scans = 0
+        for name, pattern in iter_get_routes(content_urls.urlpatterns):
+            url = route_url(name, pattern)
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                client.get(url)
+
+            findings = []
+            for sql in dict.fromkeys(query['sql'] for query in queries.captured_queries):
+                for kind, detail in self.explain(sql):
+                    if kind == 'scan' and self.row_count(detail) < min_rows:
+                        continue
+                    scans += kind == 'scan'
+                    findings.append((kind, detail, sql))
+
+            status = self.style.ERROR('SCAN') if any(kind == 'scan' for kind, _, _ in findings) else 'ok  '
+            self.stdout.write(f'{status} {name:40} {len(queries):3} queries  {url}')
+            for kind, detail, sql in findings:
+                if kind == 'scan':
+                    line = f'       full scan of {detail} ({self.row_count(detail)} rows)'
+                else:
+                    line = f'       unindexed {detail}'
+                self.stdout.write(line)
+                self.stdout.write(f'         {sql[:200]}')
+        return scans
+
+    def explain(self, sql):
+        """Yield ('scan', table) and ('sort', clause) findings for one query"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            rows = cursor.fetchall()
+        for row in rows:
+            detail = str(row[-1])
+            scan = self.scan_pattern.search(detail)
+            # Scans of subqueries and CTEs read an already filtered result
+            if scan and scan.group(1) in self.tables:
+                yield 'scan', scan.group(1)
+            sort = self.sort_pattern.search(detail)
+            if sort:
+                yield 'sort', sort.group(1)
+
+    def row_count(self, table):
+        if table not in self.row_counts:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                self.row_counts[table] = cursor.fetchone()[0]
+        return self.row_counts[table]
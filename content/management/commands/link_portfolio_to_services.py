@@ -1,85 +1,132 @@
+from collections import defaultdict, namedtuple
+
 from django.core.management.base import BaseCommand
-from content.models import PortfolioProject, ServiceItem
+from django.db import transaction
+from django.utils import timezone
+from content.cache import content_changed_in_bulk
+from content.models import PortfolioProject, PortfolioProjectTag, ServiceItem
+
+
+# Room below SQLite's bound parameter limit for the pk list of one UPDATE
+BATCH_SIZE = 10000
+
+# `service` is matched against service titles (the first service containing
+# it), `titles` against project titles and `tags` against the slugs of project
+# tags (see content.tags), all case-insensitively. A project takes the service of the first rule whose
+# titles match, otherwise of the first rule whose tags match.
+LinkRule = namedtuple('LinkRule', ['service', 'titles', 'tags'])
+
+LINK_RULES = (
+    LinkRule(
+        'Animation',
+        ('Animated Character Mascot', '3D Product Animation', 'Motion Graphics Explainer'),
+        ('animation', '3d', 'motion'),
+    ),
+    LinkRule(
+        'Brand Identity',
+        ('Brand Identity Design', 'Corporate Branding Package', 'Logo Design & Guidelines'),
+        ('brand', 'logo', 'identity'),
+    ),
+    LinkRule(
+        'Web Design',
+        ('Interactive Web Experience', 'E-commerce Website', 'Responsive Web Design'),
+        ('web', 'website', 'ui', 'ux'),
+    ),
+    LinkRule(
+        'Digital Marketing',
+        ('Digital Marketing Campaign', 'Social Media Strategy', 'Content Marketing Campaign'),
+        ('marketing', 'social', 'campaign'),
+    ),
+)
+
+
+def resolve_rules(rules):
+    """Pair each rule with the `(pk, title)` of its service, dropping rules without one"""
+    services = list(ServiceItem.objects.values_list('pk', 'title'))
+    resolved = []
+    for rule in rules:
+        service = next((service for service in services if rule.service.lower() in service[1].lower()), None)
+        if service:
+            resolved.append((rule, service))
+    return resolved
+
+
+def _matches(keywords, text):
+    return any(keyword.lower() in text for keyword in keywords)
+
+
+def unlinked_project_tags():
+    """Return `{project pk: tag slugs joined by spaces}` for projects without a service"""
+    slugs = defaultdict(list)
+    links = PortfolioProjectTag.objects.filter(project__service__isnull=True).values_list('project_id', 'tag__slug')
+    for pk, slug in links.iterator():
+        slugs[pk].append(slug)
+    return {pk: ' '.join(project_slugs) for pk, project_slugs in slugs.items()}
+
+
+def plan_links(rules):
+    """
+    Return `{(service pk, service title): [(project pk, project title, by_tag)]}`
+    for every project without a service, from one pass over the projects
+    """
+    resolved = resolve_rules(rules)
+    tags = unlinked_project_tags()
+    plan = {}
+    projects = PortfolioProject.objects.filter(service__isnull=True).order_by('pk')
+    for pk, title in projects.values_list('pk', 'title').iterator():
+        title_text = title.lower()
+        tag_text = tags.get(pk, '')
+        match = next(((service, False) for rule, service in resolved if _matches(rule.titles, title_text)), None)
+        if match is None:
+            match = next(((service, True) for rule, service in resolved if _matches(rule.tags, tag_text)), None)
+        if match:
+            service, by_tag = match
+            plan.setdefault(service, []).append((pk, title, by_tag))
+    return plan
 
 
 class Command(BaseCommand):
     help = 'Link existing portfolio projects to appropriate services'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Print the planned links without saving them'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
         self.stdout.write('Starting to link portfolio projects to services...')
-        
-        # Get services
-        animation_service = ServiceItem.objects.filter(title__icontains='Animation').first()
-        brand_identity_service = ServiceItem.objects.filter(title__icontains='Brand Identity').first()
-        web_design_service = ServiceItem.objects.filter(title__icontains='Web Design').first()
-        digital_marketing_service = ServiceItem.objects.filter(title__icontains='Digital Marketing').first()
-        
-        # Link portfolio projects based on their titles/tags
-        portfolio_mappings = {
-            'Animated Character Mascot': animation_service,
-            '3D Product Animation': animation_service,
-            'Motion Graphics Explainer': animation_service,
-            'Brand Identity Design': brand_identity_service,
-            'Corporate Branding Package': brand_identity_service,
-            'Logo Design & Guidelines': brand_identity_service,
-            'Interactive Web Experience': web_design_service,
-            'E-commerce Website': web_design_service,
-            'Responsive Web Design': web_design_service,
-            'Digital Marketing Campaign': digital_marketing_service,
-            'Social Media Strategy': digital_marketing_service,
-            'Content Marketing Campaign': digital_marketing_service,
-        }
-        
+
+        plan = plan_links(LINK_RULES)
         linked_count = 0
-        
-        for project_title_part, service in portfolio_mappings.items():
-            if service:
-                projects = PortfolioProject.objects.filter(title__icontains=project_title_part)
-                for project in projects:
-                    if not project.service:  # Only update if not already linked
-                        project.service = service
-                        project.save()
-                        linked_count += 1
+        # One UPDATE per service; projects linked since the plan was made keep
+        # their service
+        with transaction.atomic():
+            for (service_pk, service_title), projects in plan.items():
+                if not dry_run:
+                    now = timezone.now()
+                    pks = [pk for pk, _, _ in projects]
+                    for start in range(0, len(pks), BATCH_SIZE):
+                        linked_count += PortfolioProject.objects.filter(
+                            pk__in=pks[start:start + BATCH_SIZE], service__isnull=True
+                        ).update(service_id=service_pk, updated_at=now)
+                else:
+                    linked_count += len(projects)
+
+                self.stdout.write(f'{service_title}: {len(projects)} projects')
+                if dry_run or options['verbosity'] > 1:
+                    for _, title, by_tag in projects:
                         self.stdout.write(
-                            self.style.SUCCESS(f'Linked "{project.title}" to "{service.title}"')
+                            self.style.SUCCESS(f'  "{title}"' + (' (by tag)' if by_tag else ''))
                         )
-        
-        # Also link remaining projects by checking tags manually
-        remaining_projects = PortfolioProject.objects.filter(service__isnull=True)
-        
-        for project in remaining_projects:
-            tags_str = str(project.tags).lower() if project.tags else ''
-            
-            if animation_service and ('animation' in tags_str or '3d' in tags_str or 'motion' in tags_str):
-                project.service = animation_service
-                project.save()
-                linked_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Linked "{project.title}" to "{animation_service.title}" (by tag)')
-                )
-            elif brand_identity_service and ('brand' in tags_str or 'logo' in tags_str or 'identity' in tags_str):
-                project.service = brand_identity_service
-                project.save()
-                linked_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Linked "{project.title}" to "{brand_identity_service.title}" (by tag)')
-                )
-            elif web_design_service and ('web' in tags_str or 'website' in tags_str or 'ui' in tags_str or 'ux' in tags_str):
-                project.service = web_design_service
-                project.save()
-                linked_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Linked "{project.title}" to "{web_design_service.title}" (by tag)')
-                )
-            elif digital_marketing_service and ('marketing' in tags_str or 'social' in tags_str or 'campaign' in tags_str):
-                project.service = digital_marketing_service
-                project.save()
-                linked_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'Linked "{project.title}" to "{digital_marketing_service.title}" (by tag)')
-                )
-        
-        self.stdout.write(
-            self.style.SUCCESS(f'\nSuccessfully linked {linked_count} portfolio projects to services!')
-        )
 
+        if linked_count and not dry_run:
+            content_changed_in_bulk(PortfolioProject)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'\nDry run: {linked_count} portfolio projects would be linked'))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(f'\nSuccessfully linked {linked_count} portfolio projects to services!')
+            )
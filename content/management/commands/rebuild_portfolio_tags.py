@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from content.cache import content_changed_in_bulk
+from content.models import PortfolioProject
+from content.tags import rebuild_portfolio_tags
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the normalized portfolio tags from the projects\' JSON tag lists'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_portfolio_tags()
+        content_changed_in_bulk(PortfolioProject)
+        self.stdout.write(self.style.SUCCESS(f'Linked projects to {total} tags'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from content.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of portfolio projects, services and FAQs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default='default',
+            help='Database alias to rebuild the index in'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic(using=options['database']):
+            total = rebuild_search_index(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from content import views  # noqa: F401  (registers the cached endpoints)
+from content.cache import reset_response_cache_stats, response_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counts of the pre-rendered response cache per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Reset the counters after printing them'
+        )
+
+    def handle(self, *args, **options):
+        stats = response_cache_stats()
+        self.stdout.write(f'  {"endpoint":30} {"hits":>8} {"misses":>8} {"hit rate":>9}')
+        for key, counts in stats.items():
+            total = counts['hits'] + counts['misses']
+            rate = f'{counts["hits"] / total:.1%}' if total else '-'
+            self.stdout.write(f'  {key:30} {counts["hits"]:8} {counts["misses"]:8} {rate:>9}')
+        if options['reset']:
+            reset_response_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,101 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from content.media_jobs import (
+    claim_job, claim_jobs, process_job, release_crashed_jobs, requeue_crashed_batch, reset_stale_jobs
+)
+
+
+def _init_worker():
+    # Needed when the pool uses the spawn start method; a no-op after fork
+    django.setup()
+
+
+def _run(job_id):
+    try:
+        return job_id, process_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Process queued media jobs (resizing, thumbnails, probing) in a local process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Number of worker processes'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='Seconds to wait before polling an empty queue again'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit as soon as the queue is empty'
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        self.stdout.write(f'Media worker started with {processes} processes')
+
+        pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+        # Unfinished jobs of a crashed batch, run one at a time to find the
+        # one that crashed it
+        suspects = []
+        try:
+            while True:
+                requeued, failed = reset_stale_jobs()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs'))
+                if failed:
+                    self.stdout.write(self.style.ERROR(f'Failed {failed} stale jobs that used up their attempts'))
+
+                if suspects:
+                    job_id = suspects.pop(0)
+                    job_ids = [job_id] if claim_job(job_id) else []
+                    if not job_ids:
+                        continue
+                else:
+                    job_ids = claim_jobs(processes * 2)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                # Database connections must not be shared with forked children
+                connections.close_all()
+                finished = set()
+                try:
+                    for job_id, job_status in pool.map(_run, job_ids):
+                        finished.add(job_id)
+                        style = self.style.SUCCESS if job_status == 'done' else self.style.WARNING
+                        self.stdout.write(style(f'Job {job_id}: {job_status}'))
+                except BrokenProcessPool:
+                    # A job killed its worker process (e.g. out of memory).
+                    # Alone in its batch it is known and charged an attempt;
+                    # otherwise the unfinished jobs are retried one by one.
+                    # Either way carry on with a new pool.
+                    unfinished = [job_id for job_id in job_ids if job_id not in finished]
+                    if len(job_ids) == 1:
+                        requeued, failed = release_crashed_jobs(unfinished)
+                        self.stdout.write(self.style.ERROR(
+                            f'Job {job_ids[0]} crashed its worker process: requeued {requeued}, failed {failed}'
+                        ))
+                    else:
+                        requeued = requeue_crashed_batch(unfinished)
+                        suspects.extend(unfinished)
+                        self.stdout.write(self.style.ERROR(
+                            f'A worker process crashed: retrying {requeued} jobs one at a time'
+                        ))
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker)
+        finally:
+            pool.shutdown()
+
+        self.stdout.write(self.style.SUCCESS('Media queue is empty'))
@@ -0,0 +1,153 @@
+import multiprocessing
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from content.benchmarks.seed import seed_content
+from content.benchmarks.utils import isolated_environment, percentile
+from content.sqlite import get_pragmas
+
+
+READ_URLS = ['/api/portfolio/', '/api/contact-form/']
+WRITE_URL = '/api/contact-form/'
+
+
+def worker(kind, index, deadline, queue):
+    """
+    Issue reads or contact form submissions until `deadline`, recording the
+    total request time and the time spent inside database calls, which is
+    where waiting on another process's lock shows up.
+    """
+    client = Client()
+    timings, db_timings, errors = [], [], 0
+    db_time = [0.0]
+
+    def timed_execute(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            db_time[0] += time.perf_counter() - start
+
+    try:
+        with connection.execute_wrapper(timed_execute):
+            while time.time() < deadline:
+                db_time[0] = 0.0
+                start = time.perf_counter()
+                try:
+                    if kind == 'read':
+                        response = client.get(READ_URLS[len(timings) % len(READ_URLS)])
+                    else:
+                        response = client.post(WRITE_URL, {
+                            'name': f'Stress {index}',
+                            'email': f'stress{index}@example.com',
+                            'message': 'Concurrent write',
+                        })
+                    failed = response.status_code >= 400
+                except OperationalError:
+                    failed = True
+                timings.append((time.perf_counter() - start) * 1000)
+                db_timings.append(db_time[0] * 1000)
+                errors += failed
+    finally:
+        connections.close_all()
+        queue.put((kind, timings, db_timings, errors))
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer a file-backed SQLite database with concurrent API reads and contact '
+        'form submissions, once with SQLite defaults and once with SQLITE_PRAGMAS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Concurrent reader processes'
+        )
+        parser.add_argument(
+            '--writers', type=int, default=2,
+            help='Concurrent contact form submitting processes'
+        )
+        parser.add_argument(
+            '--duration', type=float, default=5.0,
+            help='Seconds to run each mode'
+        )
+        parser.add_argument(
+            '--scale', type=int, default=100,
+            help='Number of portfolio projects/submissions to seed'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('stress_sqlite only applies to the SQLite backend')
+
+        modes = [
+            ('default', {}, 'DEFERRED'),
+            ('tuned', get_pragmas(), connection.settings_dict['OPTIONS'].get('transaction_mode', 'DEFERRED')),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas, transaction_mode in modes:
+                path = str(Path(directory) / f'stress-{name}.sqlite3')
+                with self.file_database(path, pragmas, transaction_mode):
+                    seed_content(options['scale'])
+                    self.report(name, pragmas, self.run(options))
+
+    @contextmanager
+    def file_database(self, path, pragmas, transaction_mode):
+        """Create the test database as a file at `path` with the given connection tuning"""
+        settings_dict = connection.settings_dict
+        saved_test, saved_options = dict(settings_dict['TEST']), dict(settings_dict['OPTIONS'])
+        settings_dict['TEST']['NAME'] = path
+        settings_dict['OPTIONS']['transaction_mode'] = transaction_mode
+        try:
+            with override_settings(SQLITE_PRAGMAS=pragmas), isolated_environment():
+                yield
+        finally:
+            settings_dict['TEST'] = saved_test
+            settings_dict['OPTIONS'] = saved_options
+
+    def run(self, options):
+        """Run reader and writer processes, like gunicorn workers, and collect their timings"""
+        context = multiprocessing.get_context('fork')
+        queue = context.Queue()
+        deadline = time.time() + options['duration']
+        connections.close_all()  # children must open their own connections
+        processes = [context.Process(target=worker, args=('read', i, deadline, queue)) for i in range(options['readers'])]
+        processes += [context.Process(target=worker, args=('write', i, deadline, queue)) for i in range(options['writers'])]
+        for process in processes:
+            process.start()
+        results = {'duration': options['duration']}
+        for kind in ('read', 'write'):
+            results.update({kind: [], f'{kind}_db': [], f'{kind}_errors': 0})
+        for _ in processes:
+            kind, timings, db_timings, errors = queue.get()
+            results[kind].extend(timings)
+            results[f'{kind}_db'].extend(db_timings)
+            results[f'{kind}_errors'] += errors
+        for process in processes:
+            process.join()
+        return results
+
+    def report(self, name, pragmas, results):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        self.stdout.write(f'{name} (journal_mode={journal_mode}, {len(pragmas)} pragmas)')
+        for kind in ('read', 'write'):
+            for label, timings in ((kind, results[kind]), ('  in db', results[f'{kind}_db'])):
+                timings = timings or [0]
+                self.stdout.write(
+                    f'  {label:7} p50 {percentile(timings, 50):8.2f}ms  p95 {percentile(timings, 95):8.2f}ms  '
+                    f'p99 {percentile(timings, 99):8.2f}ms  max {max(timings):8.2f}ms'
+                )
+            self.stdout.write(
+                f'          {len(results[kind]) / results["duration"]:.1f} {kind}s/s, '
+                f'{results[f"{kind}_errors"]} errors'
+            )
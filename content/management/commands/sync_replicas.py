@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from content.generation import get_generation
+from content.routers import mark_replica_synced, replica_aliases, synced_replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database onto the DATABASE_REPLICAS files with the online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and check for content changes every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        replicas = replica_aliases()
+        if not replicas:
+            raise CommandError('No DATABASE_REPLICAS are configured')
+        for alias in ['default', *replicas]:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'sync_replicas only copies SQLite databases, "{alias}" is {connections[alias].vendor}')
+
+        while True:
+            stale = [alias for alias in replicas if alias not in synced_replicas()]
+            if stale:
+                self.sync(stale)
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, aliases):
+        # Read the generation first: a change committed during the copy moves
+        # the generation on, leaving the replica marked stale until next time
+        generation = get_generation()
+        source = connections['default']
+        source.ensure_connection()
+        for alias in aliases:
+            target = connections[alias]
+            target.ensure_connection()
+            start = time.perf_counter()
+            source.connection.backup(target.connection)
+            mark_replica_synced(alias, generation)
+            self.stdout.write(
+                f'Synced {alias} ({target.settings_dict["NAME"]}) at generation {generation} '
+                f'in {(time.perf_counter() - start) * 1000:.1f}ms'
+            )
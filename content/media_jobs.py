@@ -0,0 +1,224 @@
+"""
+Database-backed media job queue.
+
+Saving a row with new uploads only queues `MediaJob` rows; the resizing and
+probing happens in `manage.py run_media_worker`, so admin requests never
+wait on Pillow or ffprobe. Jobs are claimed with a conditional UPDATE, which
+lets several workers share the queue without an external broker.
+"""
+import json
+import logging
+import shutil
+import subprocess
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from PIL import Image
+
+from .cache import content_changed_in_bulk
+from .images import refresh_image_variants, stale_image_fields
+from .models import MediaJob
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETRY_DELAY = 30
+DEFAULT_JOB_TIMEOUT = 600
+
+
+def enqueue_media_jobs(instance):
+    """Queue processing for the new or replaced uploads of `instance`"""
+    content_type = ContentType.objects.get_for_model(instance)
+    wanted = []
+    for field_name in stale_image_fields(instance):
+        wanted.append((MediaJob.KIND_DERIVATIVES, field_name, getattr(instance, field_name).name or ''))
+    for field_name in getattr(instance, 'probed_media_fields', ()):
+        field_file = getattr(instance, field_name)
+        if field_file:
+            wanted.append((MediaJob.KIND_PROBE, field_name, field_file.name))
+
+    jobs = []
+    for kind, field_name, source_name in wanted:
+        existing = MediaJob.objects.filter(
+            content_type=content_type, object_id=instance.pk, kind=kind,
+            field_name=field_name, source_name=source_name,
+        )
+        if kind == MediaJob.KIND_PROBE:
+            # A probe result stays valid for as long as the file is unchanged
+            already_queued = existing.exclude(status=MediaJob.STATUS_FAILED).exists()
+        else:
+            already_queued = existing.filter(
+                status__in=[MediaJob.STATUS_PENDING, MediaJob.STATUS_RUNNING]
+            ).exists()
+        if not already_queued:
+            jobs.append(MediaJob.objects.create(
+                content_type=content_type, object_id=instance.pk, kind=kind,
+                field_name=field_name, source_name=source_name,
+            ))
+
+    if getattr(settings, 'MEDIA_JOBS_INLINE', False):
+        for job in jobs:
+            if claim_job(job.pk):
+                process_job(job.pk)
+    return jobs
+
+
+def claim_job(job_id):
+    """Atomically move a pending job to running; returns False if taken"""
+    return bool(MediaJob.objects.filter(pk=job_id, status=MediaJob.STATUS_PENDING).update(
+        status=MediaJob.STATUS_RUNNING,
+        attempts=F('attempts') + 1,
+        started_at=timezone.now(),
+        finished_at=None,
+    ))
+
+
+def claim_jobs(limit):
+    """Claim up to `limit` due jobs and return their ids"""
+    candidates = MediaJob.objects.filter(
+        status=MediaJob.STATUS_PENDING, run_after__lte=timezone.now()
+    ).order_by('run_after', 'pk').values_list('pk', flat=True)[:limit]
+    return [job_id for job_id in list(candidates) if claim_job(job_id)]
+
+
+def _release_jobs(jobs, reason):
+    """
+    Requeue the running `jobs` whose worker died, or fail those that have
+    used up their attempts: a file that kills the worker (a decompression
+    bomb, an out-of-memory Pillow or ffprobe) never reaches process_job's
+    failure handling and would otherwise be retried forever. Returns
+    `(requeued, failed)` counts.
+    """
+    now = timezone.now()
+    jobs = jobs.filter(status=MediaJob.STATUS_RUNNING)
+    failed = jobs.filter(attempts__gte=F('max_attempts')).update(
+        status=MediaJob.STATUS_FAILED, last_error=reason, finished_at=now, updated_at=now,
+    )
+    requeued = jobs.update(status=MediaJob.STATUS_PENDING, last_error=reason, updated_at=now)
+    return requeued, failed
+
+
+def reset_stale_jobs():
+    """Requeue (or fail, see `_release_jobs`) jobs left running by a worker that died"""
+    timeout = getattr(settings, 'MEDIA_JOB_TIMEOUT', DEFAULT_JOB_TIMEOUT)
+    return _release_jobs(
+        MediaJob.objects.filter(started_at__lt=timezone.now() - timedelta(seconds=timeout)),
+        f'Worker did not finish the job within {timeout} seconds',
+    )
+
+
+def release_crashed_jobs(job_ids):
+    """Requeue (or fail) the jobs of a batch whose worker process crashed"""
+    return _release_jobs(MediaJob.objects.filter(pk__in=job_ids), 'Worker process crashed')
+
+
+def requeue_crashed_batch(job_ids):
+    """
+    Requeue the unfinished jobs of a crashed batch without counting the
+    attempt, since any one of them may have killed the worker. The worker
+    then runs them one at a time, so that the next crash is charged (with
+    `release_crashed_jobs`) to the job that caused it.
+    """
+    return MediaJob.objects.filter(pk__in=job_ids, status=MediaJob.STATUS_RUNNING).update(
+        status=MediaJob.STATUS_PENDING, attempts=F('attempts') - 1,
+        last_error='Worker process crashed', updated_at=timezone.now(),
+    )
+
+
+def probe_media(field_file):
+    """Return the dimensions (and duration for video) of an uploaded file"""
+    try:
+        with field_file.storage.open(field_file.name, 'rb') as source:
+            image = Image.open(source)
+            return {'type': 'image', 'format': image.format, 'width': image.width, 'height': image.height}
+    except OSError:
+        pass
+
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        return {'type': 'unknown', 'detail': 'Not an image and ffprobe is not installed'}
+    output = subprocess.run(
+        [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+         '-show_entries', 'stream=width,height:format=duration', '-of', 'json',
+         field_file.path],
+        capture_output=True, check=True, text=True, timeout=60,
+    ).stdout
+    data = json.loads(output)
+    stream = (data.get('streams') or [{}])[0]
+    duration = data.get('format', {}).get('duration')
+    return {
+        'type': 'video',
+        'width': stream.get('width'),
+        'height': stream.get('height'),
+        'duration': float(duration) if duration else None,
+    }
+
+
+def _save_image_variants(instance, field_name):
+    model = type(instance)
+    with transaction.atomic():
+        # Merge into the stored manifest so jobs for other fields of the same
+        # row are not overwritten. The no-op UPDATE takes the row lock (the
+        # write lock on SQLite) before reading, unlike SELECT ... FOR UPDATE
+        # which SQLite ignores.
+        rows = model.objects.filter(pk=instance.pk)
+        rows.update(image_variants=F('image_variants'))
+        current = rows.values_list('image_variants', flat=True).first()
+        manifests = dict(current or {})
+        if field_name in instance.image_variants:
+            manifests[field_name] = instance.image_variants[field_name]
+        else:
+            manifests.pop(field_name, None)
+        rows.update(image_variants=manifests)
+    content_changed_in_bulk(model)
+
+
+def run_job(job):
+    """Do the work for one job and return its result"""
+    instance = job.target
+    if instance is None:
+        return {'skipped': 'Row no longer exists'}
+    if job.kind == MediaJob.KIND_DERIVATIVES:
+        if refresh_image_variants(instance, [job.field_name]):
+            _save_image_variants(instance, job.field_name)
+        return (instance.image_variants or {}).get(job.field_name, {})
+    if job.kind == MediaJob.KIND_PROBE:
+        field_file = getattr(instance, job.field_name)
+        if not field_file:
+            return {'skipped': 'File was removed'}
+        return probe_media(field_file)
+    raise ValueError(f'Unknown media job kind "{job.kind}"')
+
+
+def process_job(job_id):
+    """
+    Run a claimed job and record the outcome. Failed jobs are retried with
+    exponential backoff until `max_attempts` is reached.
+    """
+    job = MediaJob.objects.get(pk=job_id)
+    try:
+        result = run_job(job)
+    except Exception:
+        logger.exception('Media job %s failed', job_id)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = MediaJob.STATUS_FAILED
+            job.finished_at = timezone.now()
+        else:
+            delay = getattr(settings, 'MEDIA_JOB_RETRY_DELAY', DEFAULT_RETRY_DELAY)
+            job.status = MediaJob.STATUS_PENDING
+            job.run_after = timezone.now() + timedelta(seconds=delay * 2 ** (job.attempts - 1))
+        job.save(update_fields=['status', 'last_error', 'finished_at', 'run_after', 'updated_at'])
+        return job.status
+
+    job.status = MediaJob.STATUS_DONE
+    job.result = result
+    job.last_error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'last_error', 'finished_at', 'updated_at'])
+    return job.status
@@ -0,0 +1,42 @@
+"""
+In-memory copy of the content database.
+
+With `CONTENT_MEMORY_REPLICA` enabled, each worker thread holds a private
+`:memory:` SQLite copy of the primary database, made with SQLite's online
+backup API, and the read-only content actions query it instead of the disk.
+The copy remembers the content generation it was taken at and is taken again
+on the first read after the generation moves on. Only a SQLite primary can be
+copied this way; otherwise reads fall through to the other replicas.
+"""
+from django.conf import settings
+from django.db import connections
+
+from .generation import get_generation
+
+
+MEMORY_ALIAS = 'memory'
+
+
+def memory_replica_enabled():
+    return MEMORY_ALIAS in settings.DATABASES
+
+
+def refresh_memory_replica(force=False):
+    """
+    Bring this thread's in-memory copy up to the current content generation.
+    Returns False when no usable copy can be made.
+    """
+    source = connections['default']
+    if not memory_replica_enabled() or source.vendor != 'sqlite':
+        return False
+    target = connections[MEMORY_ALIAS]
+    # Read the generation before copying: a change committed during the copy
+    # moves it on and the next request copies again
+    generation = get_generation()
+    if not force and getattr(target, 'content_generation', None) == generation:
+        return True
+    source.ensure_connection()
+    target.ensure_connection()
+    source.connection.backup(target.connection)
+    target.content_generation = generation
+    return True
@@ -0,0 +1,38 @@
+"""
+Middleware for the content app.
+"""
+from django.conf import settings
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+DEFAULT_MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+
+
+class MediaFilesMiddleware:
+    """
+    Serve uploaded files under MEDIA_URL from MEDIA_ROOT through WhiteNoise,
+    with Cache-Control, ETag/Last-Modified and range request support.
+
+    Uploads appear after startup, so each request looks its file up on disk
+    instead of using an index built once like WhiteNoise does for static
+    files.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.MEDIA_URL
+        self.files = WhiteNoise(
+            None,
+            autorefresh=True,
+            max_age=getattr(settings, 'MEDIA_CACHE_MAX_AGE', DEFAULT_MEDIA_CACHE_MAX_AGE),
+            allow_all_origins=True,
+        )
+        self.files.add_files(str(settings.MEDIA_ROOT), prefix=self.prefix)
+
+    def __call__(self, request):
+        if request.path_info.startswith(self.prefix):
+            media_file = self.files.find_file(request.path_info)
+            if media_file is not None:
+                return WhiteNoiseMiddleware.serve(media_file, request)
+        return self.get_response(request)
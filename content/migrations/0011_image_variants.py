@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_aboutcontent_about_image_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aboutcontent',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the uploaded images (generated automatically)'),
+        ),
+        migrations.AddField(
+            model_name='hero',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the uploaded images (generated automatically)'),
+        ),
+        migrations.AddField(
+            model_name='navigation',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the uploaded images (generated automatically)'),
+        ),
+        migrations.AddField(
+            model_name='portfoliogalleryimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the uploaded images (generated automatically)'),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the uploaded images (generated automatically)'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized derivatives of the uploaded images (generated automatically)'),
+        ),
+    ]
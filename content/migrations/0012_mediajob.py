@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_image_variants'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveBigIntegerField(help_text='Primary key of the row that owns the media')),
+                ('field_name', models.CharField(help_text='File field to process', max_length=100)),
+                ('source_name', models.CharField(blank=True, help_text='Stored file name at the time the job was queued', max_length=500)),
+                ('kind', models.CharField(choices=[('derivatives', 'Resize / thumbnails'), ('probe', 'Probe dimensions / duration')], help_text='Type of processing', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', help_text='Current job status', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of times the job has been started')),
+                ('max_attempts', models.PositiveIntegerField(default=3, help_text='Attempts before the job is marked as failed')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time the job may run (pushed back on retry)')),
+                ('result', models.JSONField(blank=True, default=dict, help_text='Output of the job (e.g. probed dimensions and duration)')),
+                ('last_error', models.TextField(blank=True, help_text='Traceback of the last failed attempt')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_type', models.ForeignKey(help_text='Model of the row that owns the media', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Media Job',
+                'verbose_name_plural': 'Media Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='mediajob_status_run_after')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_mediajob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactformsubmission',
+            index=models.Index(fields=['-timestamp', '-id'], name='submission_timestamp_id'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(fields=['order', 'title', 'id'], name='portfolio_order_title_id'),
+        ),
+    ]
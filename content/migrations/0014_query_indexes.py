@@ -0,0 +1,81 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactformsubmission',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-timestamp', '-id'], name='submission_unread'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(fields=['order', 'question'], name='faq_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='faq',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['order', 'question'], name='faq_featured'),
+        ),
+        migrations.AddIndex(
+            model_name='feature',
+            index=models.Index(fields=['order', 'title'], name='feature_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliogalleryimage',
+            index=models.Index(fields=['portfolio_project', 'order', 'created_at'], name='gallery_project_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='portfoliogalleryimage',
+            index=models.Index(fields=['updated_at'], name='gallery_updated_at'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['order', 'title', 'id'], name='portfolio_featured'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(fields=['service', 'order', 'title', 'id'], name='portfolio_service_order'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolioproject',
+            index=models.Index(fields=['updated_at'], name='portfolio_updated_at'),
+        ),
+        migrations.AddIndex(
+            model_name='servicecategory',
+            index=models.Index(fields=['order', 'name'], name='servicecategory_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceitem',
+            index=models.Index(fields=['category', 'order', 'title'], name='serviceitem_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceitem',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['category', 'order', 'title'], name='serviceitem_featured'),
+        ),
+        migrations.AddIndex(
+            model_name='stat',
+            index=models.Index(fields=['order', 'title'], name='stat_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['order', 'name'], name='teammember_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['order', 'name'], name='teammember_featured'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['order', 'name'], name='testimonial_ordering'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['order', 'name'], name='testimonial_featured'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+
+SQLITE_SQL = [
+    "CREATE VIRTUAL TABLE content_search USING fts5(title, body, tokenize='porter unicode61 remove_diacritics 2')",
+]
+POSTGRESQL_SQL = [
+    """
+    CREATE TABLE content_search (
+        id bigint PRIMARY KEY,
+        title text NOT NULL,
+        body text NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+        ) STORED
+    )
+    """,
+    'CREATE INDEX content_search_document ON content_search USING GIN (document)',
+]
+
+# Frozen copy of content.search.SEARCH_TYPES at the time of this migration
+SEARCH_TYPES = (
+    ('PortfolioProject', 'title', ('description', 'detailed_description', 'challenge', 'solution', 'results', 'tags', 'client')),
+    ('ServiceItem', 'title', ('description', 'features')),
+    ('FAQ', 'question', ('answer',)),
+)
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return ' '.join(filter(None, (_text(item) for item in value)))
+    return str(value)
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {'sqlite': SQLITE_SQL, 'postgresql': POSTGRESQL_SQL}.get(connection.vendor)
+    if statements is None:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+    id_column = 'rowid' if connection.vendor == 'sqlite' else 'id'
+    with connection.cursor() as cursor:
+        for index, (model_name, title_field, body_fields) in enumerate(SEARCH_TYPES):
+            model = apps.get_model('content', model_name)
+            documents = [
+                (
+                    values['pk'] * len(SEARCH_TYPES) + index,
+                    _text(values[title_field]),
+                    '\n'.join(filter(None, (_text(values[field]) for field in body_fields))),
+                )
+                for values in model.objects.using(connection.alias).values('pk', title_field, *body_fields)
+            ]
+            cursor.executemany(f'INSERT INTO content_search ({id_column}, title, body) VALUES (%s, %s, %s)', documents)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE content_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.4 on 2026-10-18 10:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def link_existing_tags(apps, schema_editor):
+    """Create the tags and links for the projects that already exist"""
+    PortfolioProject = apps.get_model('content', 'PortfolioProject')
+    PortfolioTag = apps.get_model('content', 'PortfolioTag')
+    PortfolioProjectTag = apps.get_model('content', 'PortfolioProjectTag')
+    db = schema_editor.connection.alias
+
+    tag_ids, links = {}, []
+    for pk, tags in PortfolioProject.objects.using(db).values_list('pk', 'tags'):
+        for name in tags if isinstance(tags, list) else []:
+            slug = slugify(str(name))[:100]
+            if not slug:
+                continue
+            if slug not in tag_ids:
+                tag_ids[slug] = PortfolioTag.objects.using(db).create(slug=slug, name=str(name).strip()[:100]).pk
+            links.append(PortfolioProjectTag(project_id=pk, tag_id=tag_ids[slug]))
+    PortfolioProjectTag.objects.using(db).bulk_create(links, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortfolioTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="Tag as first written in a project's tags", max_length=100)),
+                ('slug', models.SlugField(help_text='Normalized tag used in ?tag= filters', max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Portfolio Tag',
+                'verbose_name_plural': 'Portfolio Tags',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PortfolioProjectTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='content.portfolioproject')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_links', to='content.portfoliotag')),
+            ],
+            options={
+                'verbose_name': 'Portfolio Project Tag',
+                'verbose_name_plural': 'Portfolio Project Tags',
+                'indexes': [models.Index(fields=['tag', 'project'], name='project_tag_by_tag')],
+                'constraints': [models.UniqueConstraint(fields=('project', 'tag'), name='unique_project_tag')],
+            },
+        ),
+        migrations.RunPython(link_existing_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:03
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_portfolio_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='spool_id',
+            field=models.UUIDField(blank=True, editable=False, help_text='Id given to a buffered submission, so replaying the spool never duplicates it', null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='contactformsubmission',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Submission timestamp'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:16
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0017_contact_spool'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='serviceitem',
+            name='serviceitem_featured',
+        ),
+        migrations.RenameIndex(
+            model_name='serviceitem',
+            new_name='serviceitem_in_category',
+            old_name='serviceitem_ordering',
+        ),
+    ]
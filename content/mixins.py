@@ -0,0 +1,220 @@
+"""
+Reusable viewset mixins for the content API.
+"""
+import hashlib
+from calendar import timegm
+
+from django.db.models import F
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .cache import (
+    build_cache_key, get_cached_response, model_state, negotiate_encoding,
+    record_lookup, set_cached_response
+)
+from .routers import end_request, start_request
+
+
+def apply_query_plan(queryset, serializer_class):
+    """
+    Apply the query plan declared on a serializer's Meta to `queryset`.
+
+    Serializers list the relations they read in `Meta.select_related` and
+    `Meta.prefetch_related`, and any computed columns in `Meta.annotations`
+    (a dict of name -> expression), so that serializing a list of rows costs
+    a fixed number of queries.
+    """
+    meta = getattr(serializer_class, 'Meta', None)
+    select_related = getattr(meta, 'select_related', ())
+    prefetch_related = getattr(meta, 'prefetch_related', ())
+    annotations = getattr(meta, 'annotations', {})
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+        # Meta.ordering is ignored on aggregate queries, so keep it explicit
+        if not queryset.query.order_by:
+            queryset = queryset.order_by(*queryset.model._meta.ordering)
+    return queryset
+
+
+class QueryPlanMixin:
+    """Apply the active serializer's query plan to `get_queryset()`"""
+
+    def get_queryset(self):
+        return apply_query_plan(super().get_queryset(), self.get_serializer_class())
+
+
+def _relation_models(model, path):
+    models = []
+    for name in path.split('__'):
+        related_model = model._meta.get_field(name).related_model
+        if related_model is None:
+            break
+        models.append(related_model)
+        model = related_model
+    return models
+
+
+def _expression_paths(expression):
+    if isinstance(expression, F):
+        yield expression.name
+        return
+    for source in expression.get_source_expressions():
+        if source is not None:
+            yield from _expression_paths(source)
+
+
+def query_plan_models(serializer_class, model):
+    """Return the related models read by a serializer's query plan"""
+    meta = getattr(serializer_class, 'Meta', None)
+    paths = [
+        *getattr(meta, 'select_related', ()),
+        *getattr(meta, 'prefetch_related', ()),
+    ]
+    for expression in getattr(meta, 'annotations', {}).values():
+        paths.extend(_expression_paths(expression))
+    models = []
+    for path in paths:
+        models.extend(_relation_models(model, path))
+    return models
+
+
+class ReplicaReadMixin:
+    """
+    Send the read-only actions of a viewset to a database replica.
+
+    Routing state is held in context variables for the duration of the
+    request, see `content.routers`.
+    """
+    replica_actions = ('list', 'retrieve', 'current', 'featured', 'by_service', 'by_slug', 'tags')
+
+    def initial(self, request, *args, **kwargs):
+        self.routing_state = None
+        # Throttling runs first, so a throttled request never refreshes the
+        # in-memory copy
+        super().initial(request, *args, **kwargs)
+        read_only = request.method in ('GET', 'HEAD') and self.action in self.replica_actions
+        self.routing_state = start_request(read_only)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'routing_state', None) is not None:
+            end_request(self.routing_state)
+            self.routing_state = None
+        return response
+
+
+class ResponseCacheMixin:
+    """
+    Serve actions decorated with `cache_response` from stored bytes.
+
+    The first request renders the response once and stores it in identity,
+    gzip and (with the Brotli package) brotli encodings. Later requests get
+    the stored bytes for their Accept-Encoding without rendering, compressing
+    or touching the database. Place before `ConditionalGetMixin` so that a
+    304 skips the lookup.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_cache = None
+        if request.method not in ('GET', 'HEAD') or getattr(self, 'conditional_response', None) is not None:
+            return
+        key = getattr(getattr(self, self.action or '', None), 'response_cache_key', None)
+        if key is None:
+            return
+        # The namespace is fixed here, before the response is built, see
+        # build_cache_key
+        cache_key = build_cache_key(key, request, kwargs)
+        encoding = negotiate_encoding(request)
+        cached = get_cached_response(cache_key, encoding)
+        record_lookup(key, cached is not None)
+        self.response_cache = (cache_key, encoding, cached is not None)
+        if cached is not None:
+            content_type, body = cached
+            response = HttpResponse(body, content_type=content_type)
+            setattr(self, request.method.lower(), lambda request, *args, **kwargs: response)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'response_cache', None) is None:
+            return response
+        cache_key, encoding, hit = self.response_cache
+        if not hit:
+            if response.status_code != 200:
+                return response
+            response.render()
+            set_cached_response(cache_key, response['Content-Type'], response.content)
+            if encoding != 'identity':
+                response.content = get_cached_response(cache_key, encoding)[1]
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+            # The same validators cover every encoding, so they are weak
+            etag = response.get('ETag')
+            if etag and not etag.startswith('W/'):
+                response['ETag'] = f'W/{etag}'
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for read actions.
+
+    Validators are derived from the row count and MAX(updated_at) of the
+    viewset's model and every model its serializer's query plan reads (plus
+    any listed in `conditional_models`), so a matching If-None-Match or
+    If-Modified-Since is answered with a 304 before the queryset is
+    evaluated or anything is serialized.
+    """
+    conditional_actions = ('list', 'retrieve', 'current', 'featured', 'by_service', 'by_slug', 'services', 'tags')
+    conditional_models = ()
+
+    def get_conditional_models(self):
+        model = self.queryset.model
+        models = [model, *query_plan_models(self.get_serializer_class(), model), *self.conditional_models]
+        return list(dict.fromkeys(models))
+
+    def get_validators(self, request):
+        """Return `(etag, last_modified timestamp)` for the current request"""
+        fingerprint = [request.get_host(), request.get_full_path()]
+        last_modified = None
+        for model in self.get_conditional_models():
+            count, model_last_modified = model_state(model)
+            fingerprint.append((model._meta.label_lower, count, model_last_modified and model_last_modified.isoformat()))
+            if model_last_modified and (last_modified is None or model_last_modified > last_modified):
+                last_modified = model_last_modified
+        etag = '"%s"' % hashlib.md5(repr(fingerprint).encode()).hexdigest()
+        if last_modified is not None:
+            last_modified = timegm(last_modified.utctimetuple())
+        return etag, last_modified
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.conditional_validators = None
+        self.conditional_response = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.conditional_actions:
+            return
+        self.conditional_validators = self.get_validators(request)
+        etag, last_modified = self.conditional_validators
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            # Swap the action handler so dispatch() returns the 304 without
+            # running the action
+            self.conditional_response = not_modified
+            setattr(self, request.method.lower(), lambda request, *args, **kwargs: not_modified)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, 'conditional_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
@@ -1,9 +1,46 @@
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 from django.core.validators import URLValidator
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 
-class Navigation(models.Model):
+class SingletonModel(models.Model):
+    """
+    Content with exactly one row, published by the `current` endpoints and
+    kept serialized in memory (see `content.singletons`). Creating a second
+    row is refused; edit the existing one instead.
+    """
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def load(cls):
+        """Return the row, or None if it has not been created yet"""
+        return cls._default_manager.order_by('pk').first()
+
+    def validate_single_row(self):
+        if self._state.adding and type(self)._default_manager.exists():
+            raise ValidationError(
+                f'{self._meta.verbose_name} already exists, edit the existing entry instead'
+            )
+
+    def clean(self):
+        super().clean()
+        self.validate_single_row()
+
+    def save(self, *args, **kwargs):
+        self.validate_single_row()
+        super().save(*args, **kwargs)
+
+
+class Navigation(SingletonModel):
     """Navigation configuration for the website"""
+    responsive_image_fields = ('logo_image',)
+
     logo_image = models.ImageField(
         upload_to='navigation/',
         blank=True,
@@ -19,6 +56,12 @@ class Navigation(models.Model):
         default=list,
         help_text="JSON array of menu links with name and href"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized derivatives of the uploaded images (generated automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -30,8 +73,11 @@ class Navigation(models.Model):
         return "Navigation Configuration"
 
 
-class Hero(models.Model):
+class Hero(SingletonModel):
     """Hero section content"""
+    responsive_image_fields = ('hero_image', 'hero_image_portrait')
+    probed_media_fields = ('hero_video', 'hero_video_portrait')
+
     # Video fields
     hero_video = models.FileField(
         upload_to='hero/videos/',
@@ -113,6 +159,12 @@ class Hero(models.Model):
         max_length=500,
         help_text="Call-to-action button link"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized derivatives of the uploaded images (generated automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -150,6 +202,9 @@ class ServiceCategory(models.Model):
         verbose_name = "Service Category"
         verbose_name_plural = "Service Categories"
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], name='servicecategory_ordering'),
+        ]
 
     def __str__(self):
         return self.name
@@ -193,6 +248,13 @@ class ServiceItem(models.Model):
         verbose_name = "Service Item"
         verbose_name_plural = "Service Items"
         ordering = ['category', 'order', 'title']
+        indexes = [
+            # Serves a category's `services` action, where the category's own
+            # ordering columns are fixed. The full list orders through the join
+            # by ServiceCategory.order and name, which no index on this table
+            # can serve; it only holds a few dozen rows.
+            models.Index(fields=['category', 'order', 'title'], name='serviceitem_in_category'),
+        ]
 
     def __str__(self):
         return f"{self.category.name} - {self.title}"
@@ -222,6 +284,9 @@ class Feature(models.Model):
         verbose_name = "Feature"
         verbose_name_plural = "Features"
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['order', 'title'], name='feature_ordering'),
+        ]
 
     def __str__(self):
         return self.title
@@ -252,6 +317,9 @@ class Stat(models.Model):
         verbose_name = "Statistic"
         verbose_name_plural = "Statistics"
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['order', 'title'], name='stat_ordering'),
+        ]
 
     def __str__(self):
         return f"{self.title}: {self.number}{self.suffix}"
@@ -259,6 +327,8 @@ class Stat(models.Model):
 
 class Testimonial(models.Model):
     """Customer testimonials"""
+    responsive_image_fields = ('photo_image',)
+
     name = models.CharField(
         max_length=100,
         help_text="Customer name"
@@ -299,6 +369,12 @@ class Testimonial(models.Model):
         default=False,
         help_text="Whether this testimonial should be featured"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized derivatives of the uploaded images (generated automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -306,6 +382,10 @@ class Testimonial(models.Model):
         verbose_name = "Testimonial"
         verbose_name_plural = "Testimonials"
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], name='testimonial_ordering'),
+            models.Index(fields=['order', 'name'], condition=Q(is_featured=True), name='testimonial_featured'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.company or self.role}"
@@ -313,6 +393,8 @@ class Testimonial(models.Model):
 
 class TeamMember(models.Model):
     """Team members"""
+    responsive_image_fields = ('image_upload',)
+
     name = models.CharField(
         max_length=100,
         help_text="Team member name"
@@ -347,6 +429,12 @@ class TeamMember(models.Model):
         default=False,
         help_text="Whether this team member should be featured"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized derivatives of the uploaded images (generated automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -354,6 +442,10 @@ class TeamMember(models.Model):
         verbose_name = "Team Member"
         verbose_name_plural = "Team Members"
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], name='teammember_ordering'),
+            models.Index(fields=['order', 'name'], condition=Q(is_featured=True), name='teammember_featured'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.role}"
@@ -361,6 +453,8 @@ class TeamMember(models.Model):
 
 class PortfolioProject(models.Model):
     """Portfolio projects"""
+    probed_media_fields = ('media_upload',)
+
     title = models.CharField(
         max_length=200,
         help_text="Project title"
@@ -449,25 +543,30 @@ class PortfolioProject(models.Model):
         verbose_name = "Portfolio Project"
         verbose_name_plural = "Portfolio Projects"
         ordering = ['order', 'title']
+        indexes = [
+            # Keyset pagination seeks on (order, title, id)
+            models.Index(fields=['order', 'title', 'id'], name='portfolio_order_title_id'),
+            models.Index(fields=['order', 'title', 'id'], condition=Q(is_featured=True), name='portfolio_featured'),
+            models.Index(fields=['service', 'order', 'title', 'id'], name='portfolio_service_order'),
+            # Lets the conditional GET validators aggregate without a table scan
+            models.Index(fields=['updated_at'], name='portfolio_updated_at'),
+        ]
 
     def __str__(self):
         return self.title
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            from django.utils.text import slugify
-            base_slug = slugify(self.title)
-            slug = base_slug
-            counter = 1
-            while PortfolioProject.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
-            self.slug = slug
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            from .slugs import save_with_unique_slug
+            save_with_unique_slug(self, super().save, *args, **kwargs)
 
 
 class PortfolioGalleryImage(models.Model):
     """Gallery images for portfolio projects"""
+    responsive_image_fields = ('image_upload',)
+
     portfolio_project = models.ForeignKey(
         PortfolioProject,
         on_delete=models.CASCADE,
@@ -494,6 +593,12 @@ class PortfolioGalleryImage(models.Model):
         default=0,
         help_text="Display order"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized derivatives of the uploaded images (generated automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -501,13 +606,71 @@ class PortfolioGalleryImage(models.Model):
         verbose_name = "Portfolio Gallery Image"
         verbose_name_plural = "Portfolio Gallery Images"
         ordering = ['order', 'created_at']
+        indexes = [
+            models.Index(fields=['portfolio_project', 'order', 'created_at'], name='gallery_project_ordering'),
+            models.Index(fields=['updated_at'], name='gallery_updated_at'),
+        ]
 
     def __str__(self):
         return f"{self.portfolio_project.title} - Image {self.order}"
 
 
-class AboutContent(models.Model):
+class PortfolioTag(models.Model):
+    """
+    Normalized portfolio tag, kept in sync with `PortfolioProject.tags` (see
+    `content.tags`) so projects can be filtered by tag with an index lookup
+    """
+    name = models.CharField(
+        max_length=100,
+        help_text="Tag as first written in a project's tags"
+    )
+    slug = models.SlugField(
+        max_length=100,
+        unique=True,
+        help_text="Normalized tag used in ?tag= filters"
+    )
+
+    class Meta:
+        verbose_name = "Portfolio Tag"
+        verbose_name_plural = "Portfolio Tags"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class PortfolioProjectTag(models.Model):
+    """Link between a portfolio project and one of its tags"""
+    project = models.ForeignKey(
+        PortfolioProject,
+        on_delete=models.CASCADE,
+        related_name='tag_links'
+    )
+    tag = models.ForeignKey(
+        PortfolioTag,
+        on_delete=models.CASCADE,
+        related_name='project_links'
+    )
+
+    class Meta:
+        verbose_name = "Portfolio Project Tag"
+        verbose_name_plural = "Portfolio Project Tags"
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'tag'], name='unique_project_tag'),
+        ]
+        indexes = [
+            # Tag filters look projects up by tag
+            models.Index(fields=['tag', 'project'], name='project_tag_by_tag'),
+        ]
+
+    def __str__(self):
+        return f"{self.project} - {self.tag}"
+
+
+class AboutContent(SingletonModel):
     """About section content"""
+    responsive_image_fields = ('about_image',)
+
     title = models.CharField(
         max_length=200,
         help_text="About section title"
@@ -541,6 +704,12 @@ class AboutContent(models.Model):
         null=True,
         help_text="OR URL for the about section image"
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Resized derivatives of the uploaded images (generated automatically)"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -552,7 +721,7 @@ class AboutContent(models.Model):
         return self.title
 
 
-class ContactInfo(models.Model):
+class ContactInfo(SingletonModel):
     """Contact information"""
     phone = models.CharField(
         max_length=20,
@@ -611,18 +780,31 @@ class ContactFormSubmission(models.Model):
         help_text="Message content"
     )
     timestamp = models.DateTimeField(
-        auto_now_add=True,
+        default=timezone.now,
+        editable=False,
         help_text="Submission timestamp"
     )
     is_read = models.BooleanField(
         default=False,
         help_text="Whether the message has been read"
     )
+    spool_id = models.UUIDField(
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        help_text="Id given to a buffered submission, so replaying the spool never duplicates it"
+    )
 
     class Meta:
         verbose_name = "Contact Form Submission"
         verbose_name_plural = "Contact Form Submissions"
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination seeks on (timestamp, id), newest first
+            models.Index(fields=['-timestamp', '-id'], name='submission_timestamp_id'),
+            models.Index(fields=['-timestamp', '-id'], condition=Q(is_read=False), name='submission_unread'),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.email} ({self.timestamp.strftime('%Y-%m-%d')})"
@@ -652,6 +834,95 @@ class FAQ(models.Model):
         verbose_name = "FAQ"
         verbose_name_plural = "FAQs"
         ordering = ['order', 'question']
+        indexes = [
+            models.Index(fields=['order', 'question'], name='faq_ordering'),
+            models.Index(fields=['order', 'question'], condition=Q(is_featured=True), name='faq_featured'),
+        ]
 
     def __str__(self):
         return self.question
+
+
+class MediaJob(models.Model):
+    """Background media processing job (run by `manage.py run_media_worker`)"""
+    KIND_DERIVATIVES = 'derivatives'
+    KIND_PROBE = 'probe'
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        help_text="Model of the row that owns the media"
+    )
+    object_id = models.PositiveBigIntegerField(
+        help_text="Primary key of the row that owns the media"
+    )
+    target = GenericForeignKey('content_type', 'object_id')
+    field_name = models.CharField(
+        max_length=100,
+        help_text="File field to process"
+    )
+    source_name = models.CharField(
+        max_length=500,
+        blank=True,
+        help_text="Stored file name at the time the job was queued"
+    )
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            (KIND_DERIVATIVES, 'Resize / thumbnails'),
+            (KIND_PROBE, 'Probe dimensions / duration'),
+        ],
+        help_text="Type of processing"
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            (STATUS_PENDING, 'Pending'),
+            (STATUS_RUNNING, 'Running'),
+            (STATUS_DONE, 'Done'),
+            (STATUS_FAILED, 'Failed'),
+        ],
+        default=STATUS_PENDING,
+        help_text="Current job status"
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of times the job has been started"
+    )
+    max_attempts = models.PositiveIntegerField(
+        default=3,
+        help_text="Attempts before the job is marked as failed"
+    )
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time the job may run (pushed back on retry)"
+    )
+    result = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Output of the job (e.g. probed dimensions and duration)"
+    )
+    last_error = models.TextField(
+        blank=True,
+        help_text="Traceback of the last failed attempt"
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Media Job"
+        verbose_name_plural = "Media Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='mediajob_status_run_after'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - {self.content_type.model} #{self.object_id} {self.field_name}"
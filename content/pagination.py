@@ -0,0 +1,171 @@
+"""
+Keyset (seek) pagination.
+
+Unlike page-number pagination this never runs COUNT(*) or OFFSET: every page
+is fetched with a WHERE clause on the ordering columns of the last row seen,
+so deep pages cost the same as the first one when a matching composite index
+exists.
+"""
+import base64
+import json
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+DEFAULT_MAX_PAGE_SIZE = 100
+DEFAULT_FEATURED_LIMIT = 50
+
+
+def featured_limit():
+    """Return the hard cap on rows returned by the unpaginated featured actions"""
+    return getattr(settings, 'CONTENT_FEATURED_LIMIT', DEFAULT_FEATURED_LIMIT)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a composite ordering.
+
+    `ordering` lists the ordering columns (prefix with '-' for descending).
+    The primary key is always appended as a tie-breaker so cursors stay
+    stable even when many rows share the same ordering values.
+    """
+    ordering = ('pk',)
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'CONTENT_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self):
+        ordering = list(self.ordering)
+        if not any(name.lstrip('-') in ('pk', 'id') for name in ordering):
+            ordering.append('-pk' if ordering[0].startswith('-') else 'pk')
+        return [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def encode_cursor(self, values, reverse):
+        payload = json.dumps({'v': values, 'r': int(reverse)}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            values, reverse = payload['v'], bool(payload['r'])
+            if len(values) != len(self.fields):
+                raise ValueError
+            values = [
+                self.model._meta.pk.to_python(value) if name == 'pk'
+                else self.model._meta.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, KeyError, json.JSONDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def seek_filter(self, values, reverse):
+        """Build the WHERE clause selecting rows after (or before) `values`"""
+        clauses = []
+        for index, (name, descending) in enumerate(self.fields):
+            forward = 'lt' if descending else 'gt'
+            backward = 'gt' if descending else 'lt'
+            equal = [Q(**{prev_name: prev_value}) for (prev_name, _), prev_value in zip(self.fields[:index], values)]
+            step = Q(**{f'{name}__{backward if reverse else forward}': values[index]})
+            clauses.append(reduce(and_, equal + [step]))
+        return reduce(or_, clauses)
+
+    def row_values(self, row):
+        return [getattr(row, name) for name, _ in self.fields]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.fields = self.get_ordering()
+        self.page_size_value = self.get_page_size(request)
+        values, reverse = self.decode_cursor(request)
+
+        order_by = [
+            f'-{name}' if descending != reverse else name
+            for name, descending in self.fields
+        ]
+        queryset = queryset.order_by(*order_by)
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values, reverse))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+
+        self.first_values = self.row_values(rows[0]) if rows else values
+        self.last_values = self.row_values(rows[-1]) if rows else values
+        return rows
+
+    def get_link(self, values, reverse):
+        url = self.request.build_absolute_uri()
+        if values is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(self.last_values, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.get_link(self.first_values, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class ServiceItemPagination(KeysetPagination):
+    ordering = ('order', 'title')
+
+
+class PortfolioProjectPagination(KeysetPagination):
+    ordering = ('order', 'title')
+
+
+class ContactFormSubmissionPagination(KeysetPagination):
+    ordering = ('-timestamp',)
@@ -0,0 +1,60 @@
+"""
+JSON rendering with orjson.
+
+`FastJSONRenderer` produces semantically the same JSON as DRF's
+`JSONRenderer`: compact, UTF-8, with `\\u2028`/`\\u2029` escaped, and with
+dates, times, Decimals, lazy translation strings and the other non-JSON
+types converted by DRF's own `JSONEncoder.default`. orjson only takes the
+serialization loop off the Python interpreter. Whenever the output cannot be
+matched (indented output for the browsable API or an `indent=` media type
+parameter, `UNICODE_JSON = False`, or a value orjson refuses such as an
+integer wider than 64 bits) the stock renderer is used, as it is when orjson
+is not installed.
+
+The output is not byte-identical, though. Floats in exponent notation are
+spelled the orjson way (`1e16` and `1e-7`, not `1e+16` and `1e-07`), the same
+values either way. NaN and Infinity render as `null` where the stock renderer
+raises under `STRICT_JSON`; serializer output never contains them.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+if orjson is not None:
+    # Dates and times go through DRF's encoder ('Z' suffix for UTC), int keys
+    # are turned into strings like the json module does
+    ORJSON_OPTIONS = (
+        orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+    )
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that serializes with orjson when it is installed"""
+    default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            # Let the stock renderer produce the output or the exception
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same strict javascript subset escaping as JSONRenderer
+        if LINE_SEPARATOR in ret or PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
@@ -0,0 +1,103 @@
+"""
+Primary/replica database routing.
+
+Read-only content actions (see `ReplicaReadMixin`) query the worker's
+in-memory copy when `CONTENT_MEMORY_REPLICA` is enabled (see
+`content.memory_replica`), or else one of the aliases in the
+`DATABASE_REPLICAS` setting; everything else, including every write, goes
+to `default`. Once a request writes, its remaining reads are pinned to the
+primary so it always sees its own changes.
+
+A replica is only picked while it holds the current content generation, as
+recorded by `manage.py sync_replicas` after each copy. A lagging replica is
+therefore never read, so cached responses and ETags cannot be built from
+stale rows. Replicas kept current by other means (e.g. PostgreSQL streaming
+replication) can opt out of the check with `DATABASE_REPLICA_CHECK_GENERATION`.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .generation import get_generation
+from .memory_replica import MEMORY_ALIAS, memory_replica_enabled, refresh_memory_replica
+
+
+# Replica alias chosen for the current request, or None to use the primary
+_replica = ContextVar('replica', default=None)
+# Set once the current request has written to the primary
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+
+
+def replica_aliases():
+    return list(getattr(settings, 'DATABASE_REPLICAS', []))
+
+
+def _synced_key(alias):
+    return f'replica_generation:{alias}'
+
+
+def mark_replica_synced(alias, generation):
+    """Record that replica `alias` holds the content as of `generation`"""
+    cache.set(_synced_key(alias), generation, None)
+
+
+def synced_replicas():
+    """Return the replica aliases that hold the current content generation"""
+    replicas = replica_aliases()
+    if not replicas:
+        return []
+    generation = get_generation()
+    synced = cache.get_many([_synced_key(alias) for alias in replicas])
+    return [alias for alias in replicas if synced.get(_synced_key(alias)) == generation]
+
+
+def current_replicas():
+    """Return the replica aliases that are safe to read from right now"""
+    if not getattr(settings, 'DATABASE_REPLICA_CHECK_GENERATION', True):
+        return replica_aliases()
+    return synced_replicas()
+
+
+def start_request(read_only):
+    """
+    Set up routing for a request and return the state to pass to
+    `end_request`. Read-only requests are sent to a current replica, if any.
+    """
+    replica = None
+    if read_only:
+        if memory_replica_enabled() and refresh_memory_replica():
+            replica = MEMORY_ALIAS
+        else:
+            replicas = current_replicas()
+            replica = random.choice(replicas) if replicas else None
+    return (
+        _replica.set(replica),
+        _pinned_to_primary.set(False),
+    )
+
+
+def end_request(state):
+    replica_token, pinned_token = state
+    _replica.reset(replica_token)
+    _pinned_to_primary.reset(pinned_token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replica = _replica.get()
+        if replica is None or _pinned_to_primary.get():
+            return 'default'
+        return replica
+
+    def db_for_write(self, model, **hints):
+        _pinned_to_primary.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema along with the data
+        return db not in replica_aliases() and db != MEMORY_ALIAS
@@ -0,0 +1,219 @@
+"""
+Full-text search over portfolio projects, services and FAQs.
+
+Every searchable row has one document in the `content_search` table: its
+title and the rest of its text (JSON lists such as tags and features
+flattened to words). On SQLite the table is an FTS5 index ranked with BM25;
+on PostgreSQL it holds a weighted `tsvector` with a GIN index, ranked with
+`ts_rank_cd`. Titles weigh more than the body on both.
+
+A document's id encodes the row: `pk * len(SEARCH_TYPES) + type index`, so
+the index needs no extra columns and a row is updated with a primary key
+lookup. The `post_save`/`post_delete` receivers in `content.signals` keep
+the documents up to date within the writing transaction. Bulk writes that
+bypass signals must call `index_objects`, or run
+`manage.py rebuild_search_index`.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connections, router
+
+from .mixins import apply_query_plan
+from .models import FAQ, PortfolioProject, ServiceItem
+from .serializers import FAQSerializer, FeaturedPortfolioProjectSerializer, ServiceItemListSerializer
+
+
+SEARCH_TABLE = 'content_search'
+BATCH_SIZE = 500
+
+SearchType = namedtuple('SearchType', ['name', 'model', 'serializer_class', 'title_field', 'body_fields'])
+
+# The position of each type is part of the document ids: append new types at
+# the end, or rebuild the index after reordering.
+SEARCH_TYPES = (
+    SearchType(
+        'portfolio', PortfolioProject, FeaturedPortfolioProjectSerializer, 'title',
+        ('description', 'detailed_description', 'challenge', 'solution', 'results', 'tags', 'client'),
+    ),
+    SearchType('service', ServiceItem, ServiceItemListSerializer, 'title', ('description', 'features')),
+    SearchType('faq', FAQ, FAQSerializer, 'question', ('answer',)),
+)
+TYPE_NAMES = [search_type.name for search_type in SEARCH_TYPES]
+
+_TERM = re.compile(r'\w+')
+
+
+def _search_type(model):
+    for index, search_type in enumerate(SEARCH_TYPES):
+        if search_type.model is model:
+            return index, search_type
+    return None, None
+
+
+def _document_id(index, pk):
+    return pk * len(SEARCH_TYPES) + index
+
+
+def _text(value):
+    """Flatten field values, including JSON lists and objects, to plain text"""
+    if value is None:
+        return ''
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return ' '.join(filter(None, (_text(item) for item in value)))
+    return str(value)
+
+
+def _document(search_type, values):
+    """Return `(title, body)` for a row given as a dict of field values"""
+    title = _text(values[search_type.title_field])
+    body = '\n'.join(filter(None, (_text(values[field]) for field in search_type.body_fields)))
+    return title, body
+
+
+def _id_column(connection):
+    return 'rowid' if connection.vendor == 'sqlite' else 'id'
+
+
+def _write_documents(connection, documents):
+    """Replace the documents given as `(id, title, body)` tuples"""
+    id_column = _id_column(connection)
+    with connection.cursor() as cursor:
+        for start in range(0, len(documents), BATCH_SIZE):
+            batch = documents[start:start + BATCH_SIZE]
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE {id_column} = %s', [(document[0],) for document in batch]
+            )
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} ({id_column}, title, body) VALUES (%s, %s, %s)', batch
+            )
+
+
+def _delete_documents(connection, ids):
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE {_id_column(connection)} = %s', [(pk,) for pk in ids]
+        )
+
+
+def is_searchable(model):
+    return _search_type(model)[1] is not None
+
+
+def index_object(instance, using=None):
+    """Add or update the document of one saved row"""
+    index, search_type = _search_type(type(instance))
+    values = {field: getattr(instance, field) for field in (search_type.title_field, *search_type.body_fields)}
+    connection = connections[using or router.db_for_write(search_type.model)]
+    _write_documents(connection, [(_document_id(index, instance.pk), *_document(search_type, values))])
+
+
+def remove_object(instance, using=None):
+    """Remove the document of a deleted row"""
+    index, search_type = _search_type(type(instance))
+    connection = connections[using or router.db_for_write(search_type.model)]
+    _delete_documents(connection, [_document_id(index, instance.pk)])
+
+
+def index_objects(model, pks=None, using=None):
+    """
+    Reindex rows of `model` (all of them when `pks` is None) with one query.
+    Rows in `pks` that no longer exist are removed from the index.
+    """
+    index, search_type = _search_type(model)
+    connection = connections[using or router.db_for_write(model)]
+    queryset = model._default_manager.using(connection.alias)
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    documents = []
+    for values in queryset.values('pk', search_type.title_field, *search_type.body_fields).iterator():
+        documents.append((_document_id(index, values['pk']), *_document(search_type, values)))
+    _write_documents(connection, documents)
+    if pks is not None:
+        found = {document[0] for document in documents}
+        _delete_documents(connection, [
+            document_id for document_id in (_document_id(index, pk) for pk in pks) if document_id not in found
+        ])
+    return len(documents)
+
+
+def rebuild_search_index(using='default'):
+    """Rebuild every document from scratch and return the number indexed"""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    total = sum(index_objects(search_type.model, using=using) for search_type in SEARCH_TYPES)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            # Merge the FTS5 segments written by the bulk insert
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _ranked_ids(connection, query, type_indexes, limit):
+    """Return `(document id, score)` pairs, best match first"""
+    type_filter, params = '', []
+    id_column = _id_column(connection)
+    if len(type_indexes) < len(SEARCH_TYPES):
+        type_filter = f' AND {id_column} %% {len(SEARCH_TYPES)} IN ({", ".join(["%s"] * len(type_indexes))})'
+        params = list(type_indexes)
+
+    if connection.vendor == 'sqlite':
+        # Quote every word so user input can never be read as FTS5 syntax,
+        # and match the last one as a prefix so results show while typing
+        terms = [f'"{term}"' for term in _TERM.findall(query)]
+        if not terms:
+            return []
+        match = ' '.join(terms) + '*'
+        sql = (
+            f'SELECT rowid, -bm25({SEARCH_TABLE}, 10.0, 1.0) AS score FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s{type_filter} ORDER BY score DESC, rowid LIMIT %s'
+        )
+        params = [match, *params, limit]
+    else:
+        sql = (
+            f"SELECT id, ts_rank_cd(document, query) AS score "
+            f"FROM {SEARCH_TABLE}, websearch_to_tsquery('english', %s) query "
+            f"WHERE document @@ query{type_filter} ORDER BY score DESC, id LIMIT %s"
+        )
+        params = [query, *params, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def search(query, request, types=None, limit=20):
+    """
+    Return up to `limit` results for `query`, best match first, each as
+    `{'type', 'score', 'item'}` with the row serialized like the
+    corresponding list endpoint. `types` restricts the search to some of
+    the `TYPE_NAMES`.
+    """
+    type_indexes = [index for index, search_type in enumerate(SEARCH_TYPES) if not types or search_type.name in types]
+    connection = connections[router.db_for_read(PortfolioProject)]
+    ranked = _ranked_ids(connection, query, type_indexes, limit)
+
+    pks_by_type = {}
+    for document_id, score in ranked:
+        pks_by_type.setdefault(document_id % len(SEARCH_TYPES), []).append(document_id // len(SEARCH_TYPES))
+    serialized = {}
+    context = {'request': request}
+    for index, pks in pks_by_type.items():
+        search_type = SEARCH_TYPES[index]
+        instances = list(apply_query_plan(search_type.model.objects.filter(pk__in=pks), search_type.serializer_class))
+        # One list serializer per type builds the fields once, not per row
+        data = search_type.serializer_class(instances, many=True, context=context).data
+        for instance, item in zip(instances, data):
+            serialized[_document_id(index, instance.pk)] = item
+
+    return [
+        {
+            'type': SEARCH_TYPES[document_id % len(SEARCH_TYPES)].name,
+            'score': round(score, 4),
+            'item': serialized[document_id],
+        }
+        for document_id, score in ranked
+        if document_id in serialized
+    ]
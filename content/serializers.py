@@ -1,3 +1,4 @@
+from django.db.models import Count
 from rest_framework import serializers
 from .models import (
     Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
@@ -6,16 +7,55 @@ from .models import (
 )
 
 
+class SrcsetField(serializers.Field):
+    """
+    Read-only `srcset` map for an uploaded image, built from the derivatives
+    recorded in the row's `image_variants`:
+
+        {"webp": "<url> 320w, <url> 640w", "jpeg": "..."}
+
+    Returns None until derivatives exist for the image.
+    """
+
+    def __init__(self, image_field, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        manifest = (obj.image_variants or {}).get(self.image_field)
+        if not manifest:
+            return None
+        storage = getattr(obj, self.image_field).storage
+        request = self.context.get('request')
+        srcset = {}
+        for format_name, names in manifest['variants'].items():
+            entries = []
+            for width, name in sorted(names.items(), key=lambda item: int(item[0])):
+                url = storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                entries.append(f'{url} {width}w')
+            srcset[format_name] = ', '.join(entries)
+        return srcset
+
+
 class NavigationSerializer(serializers.ModelSerializer):
+    logo_image_srcset = SrcsetField('logo_image')
+    
     class Meta:
         model = Navigation
-        fields = '__all__'
+        exclude = ['image_variants']
 
 
 class HeroSerializer(serializers.ModelSerializer):
+    hero_image_srcset = SrcsetField('hero_image')
+    hero_image_portrait_srcset = SrcsetField('hero_image_portrait')
+    
     class Meta:
         model = Hero
-        fields = '__all__'
+        exclude = ['image_variants']
 
 
 class ServiceCategorySerializer(serializers.ModelSerializer):
@@ -30,8 +70,11 @@ class ServiceCategoryListSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceCategory
         fields = ['id', 'name', 'description', 'icon', 'order', 'services_count']
+        annotations = {'services_count': Count('services')}
     
     def get_services_count(self, obj):
+        if hasattr(obj, 'services_count'):
+            return obj.services_count
         return obj.services.count()
 
 
@@ -41,6 +84,7 @@ class ServiceItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceItem
         fields = '__all__'
+        select_related = ['category']
 
 
 class ServiceItemListSerializer(serializers.ModelSerializer):
@@ -49,6 +93,7 @@ class ServiceItemListSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceItem
         fields = ['id', 'title', 'description', 'features', 'icon', 'order', 'is_featured', 'category_name']
+        select_related = ['category']
 
 
 class FeatureSerializer(serializers.ModelSerializer):
@@ -64,23 +109,28 @@ class StatSerializer(serializers.ModelSerializer):
 
 
 class TestimonialSerializer(serializers.ModelSerializer):
+    photo_image_srcset = SrcsetField('photo_image')
+    
     class Meta:
         model = Testimonial
-        fields = '__all__'
+        exclude = ['image_variants']
 
 
 class FeaturedTestimonialSerializer(serializers.ModelSerializer):
+    photo_image_srcset = SrcsetField('photo_image')
+    
     class Meta:
         model = Testimonial
-        fields = ['id', 'name', 'role', 'company', 'review', 'photo', 'rating', 'order']
+        fields = ['id', 'name', 'role', 'company', 'review', 'photo', 'photo_image_srcset', 'rating', 'order']
 
 
 class TeamMemberSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_srcset = SrcsetField('image_upload')
     
     class Meta:
         model = TeamMember
-        fields = '__all__'
+        exclude = ['image_variants']
     
     def get_image(self, obj):
         if obj.image_upload:
@@ -91,10 +141,11 @@ class TeamMemberSerializer(serializers.ModelSerializer):
 
 class FeaturedTeamMemberSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_srcset = SrcsetField('image_upload')
     
     class Meta:
         model = TeamMember
-        fields = ['id', 'name', 'role', 'bio', 'image', 'social_links', 'order']
+        fields = ['id', 'name', 'role', 'bio', 'image', 'image_srcset', 'social_links', 'order']
     
     def get_image(self, obj):
         if obj.image_upload:
@@ -105,10 +156,11 @@ class FeaturedTeamMemberSerializer(serializers.ModelSerializer):
 
 class PortfolioGalleryImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_srcset = SrcsetField('image_upload')
     
     class Meta:
         model = PortfolioGalleryImage
-        fields = ['id', 'image', 'caption', 'order']
+        fields = ['id', 'image', 'image_srcset', 'caption', 'order']
     
     def get_image(self, obj):
         request = self.context.get('request')
@@ -125,6 +177,8 @@ class PortfolioProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = PortfolioProject
         fields = '__all__'
+        select_related = ['service']
+        prefetch_related = ['gallery_images']
     
     def get_media_url(self, obj):
         request = self.context.get('request')
@@ -140,6 +194,7 @@ class FeaturedPortfolioProjectSerializer(serializers.ModelSerializer):
     class Meta:
         model = PortfolioProject
         fields = ['id', 'title', 'slug', 'description', 'media_url', 'media_type', 'tags', 'client', 'project_url', 'service_name', 'order']
+        select_related = ['service']
     
     def get_media_url(self, obj):
         request = self.context.get('request')
@@ -149,9 +204,11 @@ class FeaturedPortfolioProjectSerializer(serializers.ModelSerializer):
 
 
 class AboutContentSerializer(serializers.ModelSerializer):
+    about_image_srcset = SrcsetField('about_image')
+    
     class Meta:
         model = AboutContent
-        fields = '__all__'
+        exclude = ['image_variants']
 
 
 class ContactInfoSerializer(serializers.ModelSerializer):
@@ -163,7 +220,7 @@ class ContactInfoSerializer(serializers.ModelSerializer):
 class ContactFormSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContactFormSubmission
-        fields = '__all__'
+        exclude = ['spool_id']
         read_only_fields = ['timestamp', 'is_read']
 
 
@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_model
+from .generation import bump_generation
+from .images import delete_derivatives
+from .media_jobs import enqueue_media_jobs
+from .models import (
+    Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
+    Testimonial, TeamMember, PortfolioProject, PortfolioGalleryImage, AboutContent,
+    ContactInfo, FAQ
+)
+from .search import index_object, is_searchable, remove_object
+from .sqlite import apply_pragmas
+from .tags import sync_project_tags
+
+
+# Models whose rows are published through the public content endpoints.
+# Contact form submissions are deliberately left out: they never appear in
+# the site content and change far too often.
+CONTENT_MODELS = (
+    Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
+    Testimonial, TeamMember, PortfolioProject, PortfolioGalleryImage, AboutContent,
+    ContactInfo, FAQ
+)
+
+
+@receiver(post_save)
+def queue_media_jobs(sender, instance, raw=False, **kwargs):
+    """Queue background processing for new or replaced uploads"""
+    if raw:
+        return
+    if getattr(sender, 'responsive_image_fields', None) or getattr(sender, 'probed_media_fields', None):
+        enqueue_media_jobs(instance)
+
+
+@receiver(post_delete)
+def remove_image_variants(sender, instance, **kwargs):
+    """Delete the derivatives of a removed row"""
+    for field_name, manifest in (getattr(instance, 'image_variants', None) or {}).items():
+        if field_name in getattr(sender, 'responsive_image_fields', ()):
+            delete_derivatives(getattr(instance, field_name).storage, manifest)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def content_changed(sender, **kwargs):
+    """
+    Evict dependent cache entries and bump the content generation once the
+    change is committed, so nothing can be re-cached from (or a replica synced
+    at) the old rows under the new generation.
+    """
+    if sender in CONTENT_MODELS:
+        def publish():
+            invalidate_model(sender)
+            bump_generation()
+        transaction.on_commit(publish)
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, using, **kwargs):
+    """Refresh the search document of a saved row in the same transaction"""
+    if is_searchable(sender):
+        index_object(instance, using=using)
+
+
+@receiver(post_save, sender=PortfolioProject)
+def sync_portfolio_tags(sender, instance, using, **kwargs):
+    """Link the project to the normalized tags of its `tags` list"""
+    sync_project_tags(instance, using=using)
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    if is_searchable(sender):
+        remove_object(instance, using=using)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    """Apply the SQLITE_PRAGMAS setting to new SQLite connections"""
+    apply_pragmas(connection)
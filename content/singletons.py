@@ -0,0 +1,79 @@
+"""
+In-memory copies of the singleton content rows.
+
+Navigation, Hero, AboutContent and ContactInfo each hold a single row (see
+`SingletonModel`). Every worker keeps that row fully serialized in process
+memory and serves the `current` endpoints and the site snapshot from it.
+Like the snapshot, a copy is tagged with the content generation it was
+built at and rebuilt on the first read after the generation moves on, i.e.
+once a save or delete has been committed. The rebuilt copy replaces the old
+one in a single assignment, so readers see either the old or the new row,
+never a half-built one.
+
+Media URLs are absolute, so copies are kept per requesting host. Only the
+current generation is kept, for at most `MAX_HOSTS` hosts, least recently
+used first out: a flood of forged Host headers costs rebuilds, not memory.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from .generation import get_generation
+
+
+SingletonCopy = namedtuple('SingletonCopy', ['version', 'data'])
+
+# Hosts (absolute base URIs) a worker keeps copies for
+MAX_HOSTS = 8
+
+_lock = threading.Lock()
+# Serialized rows keyed by model and the absolute base URI of the request,
+# since uploaded media URLs are built against the requesting host.
+_copies = OrderedDict()
+
+
+def lookup_copy(copies, key, version):
+    """Return the entry of `copies` at `key` if it is of `version`, marking it as used"""
+    copy = copies.get(key)
+    if copy is None or copy.version != version:
+        return None
+    try:
+        copies.move_to_end(key)
+    except KeyError:
+        pass  # evicted meanwhile by another thread
+    return copy
+
+
+def store_copy(copies, key, copy, limit):
+    """
+    Store `copy` (which has a `version`) at `key`, dropping the entries of
+    other generations and the least recently used ones beyond `limit`. Call
+    with the lock held.
+    """
+    for stale in [other for other, entry in copies.items() if entry.version != copy.version]:
+        del copies[stale]
+    copies[key] = copy
+    copies.move_to_end(key)
+    while len(copies) > limit:
+        copies.popitem(last=False)
+
+
+def get_singleton(model, serializer_class, request):
+    """
+    Return the serialized row of the singleton `model`, or None when it has
+    not been created yet.
+    """
+    key = (model._meta.label_lower, request.build_absolute_uri('/'))
+    version = get_generation()
+    copy = lookup_copy(_copies, key, version)
+    if copy is not None:
+        return copy.data
+
+    with _lock:
+        copy = lookup_copy(_copies, key, version)
+        if copy is not None:
+            return copy.data
+        instance = model.load()
+        data = None if instance is None else serializer_class(instance, context={'request': request}).data
+        # Four singleton models per host
+        store_copy(_copies, key, SingletonCopy(version=version, data=data), MAX_HOSTS * 4)
+        return data
@@ -0,0 +1,93 @@
+"""
+Unique slug allocation.
+
+A title's slug is its `slugify`d form, or the same with the first free
+`-<n>` suffix when that is taken (`launch`, `launch-1`, `launch-2`, ...).
+All taken slugs sharing the prefix are read with one query and the free
+suffix is found in memory, however many rows share the title.
+
+Two concurrent saves can still pick the same slug; the unique constraint
+rejects the second and `save_with_unique_slug` allocates again. Backfills
+use `assign_slugs`, which allocates for any number of rows from a single
+read of the table.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+
+# Room kept at the end of the slug field for a "-<n>" suffix
+SUFFIX_LENGTH = 8
+SLUG_ATTEMPTS = 5
+
+
+def base_slug(model, title, field='slug'):
+    max_length = model._meta.get_field(field).max_length
+    return slugify(title)[:max_length - SUFFIX_LENGTH].strip('-') or model._meta.model_name
+
+
+def first_free_slug(base, taken):
+    """Return `base`, or `base-<n>` with the lowest n, that is not in `taken`"""
+    if base not in taken:
+        return base
+    prefix = f'{base}-'
+    suffixes = {
+        int(slug[len(prefix):]) for slug in taken
+        if slug.startswith(prefix) and slug[len(prefix):].isdigit()
+    }
+    counter = 1
+    while counter in suffixes:
+        counter += 1
+    return f'{prefix}{counter}'
+
+
+def next_free_slug(model, title, exclude_pk=None, field='slug', using=None):
+    """Return a free slug for `title` with one query"""
+    base = base_slug(model, title, field)
+    taken = model._default_manager.db_manager(using).filter(
+        Q(**{field: base}) | Q(**{f'{field}__startswith': f'{base}-'})
+    )
+    if exclude_pk is not None:
+        taken = taken.exclude(pk=exclude_pk)
+    return first_free_slug(base, set(taken.values_list(field, flat=True)))
+
+
+def save_with_unique_slug(instance, save, *args, field='slug', source='title', **kwargs):
+    """
+    Allocate a slug for `instance` and run `save(*args, **kwargs)`, the
+    model's real save. If a concurrent save takes the same slug first, the
+    insert is rolled back to a savepoint and a new slug allocated.
+    """
+    model = type(instance)
+    using = kwargs.get('using') or instance._state.db or 'default'
+    for attempt in range(SLUG_ATTEMPTS):
+        setattr(instance, field, next_free_slug(model, getattr(instance, source), instance.pk, field, using))
+        try:
+            with transaction.atomic(using=using):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            slug = getattr(instance, field)
+            taken = model._default_manager.db_manager(using).filter(**{field: slug}).exclude(pk=instance.pk).exists()
+            if not taken or attempt == SLUG_ATTEMPTS - 1:
+                raise
+
+
+def assign_slugs(instances, field='slug', source='title', using='default'):
+    """
+    Give every instance in `instances` without a slug a unique one, reading
+    the taken slugs once. The instances are not saved: bulk_update them in
+    the same transaction.
+    """
+    instances = [instance for instance in instances if not getattr(instance, field)]
+    if not instances:
+        return []
+    model = type(instances[0])
+    taken = set(
+        model._default_manager.db_manager(using).exclude(**{f'{field}__isnull': True})
+        .values_list(field, flat=True)
+    )
+    for instance in instances:
+        slug = first_free_slug(base_slug(model, getattr(instance, source), field), taken)
+        setattr(instance, field, slug)
+        taken.add(slug)
+    return instances
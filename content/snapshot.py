@@ -0,0 +1,98 @@
+"""
+Aggregated site snapshot.
+
+Bundles everything the homepage needs (navigation, hero, featured services,
+stats, testimonials, team, portfolio, about, contact info and FAQs) into a
+single pre-rendered JSON document. The document is kept in process memory and
+only rebuilt when the content generation moves on. Like the singleton
+copies, a snapshot is kept per requesting host for at most `MAX_HOSTS`
+hosts, and only for the current generation.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+from rest_framework.renderers import JSONRenderer
+
+from .generation import get_generation
+from .mixins import apply_query_plan
+from .pagination import featured_limit
+from .singletons import MAX_HOSTS, get_singleton, lookup_copy, store_copy
+from .models import (
+    Navigation, Hero, ServiceItem, Stat, Testimonial, TeamMember,
+    PortfolioProject, AboutContent, ContactInfo, FAQ
+)
+from .serializers import (
+    NavigationSerializer, HeroSerializer, ServiceItemSerializer, StatSerializer,
+    FeaturedTestimonialSerializer, FeaturedTeamMemberSerializer,
+    FeaturedPortfolioProjectSerializer, AboutContentSerializer,
+    ContactInfoSerializer, FAQSerializer
+)
+
+
+Snapshot = namedtuple('Snapshot', ['version', 'etag', 'payload'])
+
+_lock = threading.Lock()
+# Rendered snapshots keyed by the absolute base URI of the request, since
+# uploaded media URLs are built against the requesting host.
+_snapshots = OrderedDict()
+
+
+def _current(model, serializer_class, context):
+    return get_singleton(model, serializer_class, context['request'])
+
+
+def _many(queryset, serializer_class, context):
+    # Every section is capped like the featured actions it mirrors
+    queryset = apply_query_plan(queryset, serializer_class)[:featured_limit()]
+    return serializer_class(queryset, many=True, context=context).data
+
+
+def build_snapshot_data(request):
+    """Serialize every homepage section into one dictionary"""
+    context = {'request': request}
+    return {
+        'navigation': _current(Navigation, NavigationSerializer, context),
+        'hero': _current(Hero, HeroSerializer, context),
+        'services': _many(
+            ServiceItem.objects.filter(is_featured=True), ServiceItemSerializer, context
+        ),
+        'stats': _many(Stat.objects.all().order_by('order'), StatSerializer, context),
+        'testimonials': _many(
+            Testimonial.objects.filter(is_featured=True).order_by('order'),
+            FeaturedTestimonialSerializer, context
+        ),
+        'team': _many(
+            TeamMember.objects.filter(is_featured=True).order_by('order'),
+            FeaturedTeamMemberSerializer, context
+        ),
+        'portfolio': _many(
+            PortfolioProject.objects.filter(is_featured=True),
+            FeaturedPortfolioProjectSerializer, context
+        ),
+        'about': _current(AboutContent, AboutContentSerializer, context),
+        'contact_info': _current(ContactInfo, ContactInfoSerializer, context),
+        'faqs': _many(
+            FAQ.objects.filter(is_featured=True).order_by('order'), FAQSerializer, context
+        ),
+    }
+
+
+def get_snapshot(request):
+    """Return the rendered snapshot, rebuilding it if the content has changed"""
+    base_uri = request.build_absolute_uri('/')
+    version = get_generation()
+    snapshot = lookup_copy(_snapshots, base_uri, version)
+    if snapshot is not None:
+        return snapshot
+
+    with _lock:
+        snapshot = lookup_copy(_snapshots, base_uri, version)
+        if snapshot is not None:
+            return snapshot
+        payload = JSONRenderer().render({
+            'version': version,
+            **build_snapshot_data(request),
+        })
+        snapshot = Snapshot(version=version, etag=f'"snapshot-{version}"', payload=payload)
+        store_copy(_snapshots, base_uri, snapshot, MAX_HOSTS)
+        return snapshot
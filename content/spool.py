@@ -0,0 +1,165 @@
+"""
+Write-behind spool for contact form submissions.
+
+With `CONTACT_SUBMISSIONS_BUFFERED` a validated submission is appended as a
+JSON line to `incoming.jsonl` in `CONTACT_SPOOL_DIR` and fsynced before the
+request is acknowledged, so it survives a crash or restart without the
+request ever taking the database write lock. `manage.py flush_contact_spool`
+moves the file aside (a rename, so new submissions start a fresh file) and
+writes its rows with `bulk_create` in batches.
+
+Writers hold a shared lock on the file while appending and the flusher takes
+an exclusive one before reading, so a batch is only read once every append
+to it has finished; a writer that opened the file just before it was moved
+notices and appends to the new file instead. Every submission carries a
+`spool_id`: a batch that was partly written when the flusher stopped is
+replayed in full and the rows already saved are skipped.
+"""
+import fcntl
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ContactFormSubmission
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+INCOMING = 'incoming.jsonl'
+BATCH_PATTERN = 'batch-*.jsonl'
+# Lines that cannot be parsed are kept here instead of being dropped
+REJECTED = 'rejected.jsonl'
+
+
+def spool_dir():
+    return Path(settings.CONTACT_SPOOL_DIR)
+
+
+def _same_file(fd, path):
+    """Whether the open `fd` is still the file at `path`"""
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(fd)
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+
+def _fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _append(path, data):
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        if not _same_file(fd, path):
+            return False
+        created = os.fstat(fd).st_size == 0
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+        if created:
+            # Make the new directory entry durable as well
+            _fsync_dir(path.parent)
+        return True
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+def spool_submission(data):
+    """Durably queue a validated submission and return its `spool_id`"""
+    record = {**data, 'spool_id': uuid.uuid4().hex, 'timestamp': timezone.now()}
+    line = (json.dumps(record, cls=DjangoJSONEncoder) + '\n').encode()
+    directory = spool_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    # Retry when the flusher moved the file between our open and our lock
+    while not _append(directory / INCOMING, line):
+        pass
+    return record['spool_id']
+
+
+def _submission(record):
+    fields = {field.attname for field in ContactFormSubmission._meta.concrete_fields} - {'id'}
+    values = {name: value for name, value in record.items() if name in fields}
+    values['timestamp'] = parse_datetime(values['timestamp'])
+    values['spool_id'] = uuid.UUID(values['spool_id'])
+    return ContactFormSubmission(**values)
+
+
+def _flush_batch(path, batch_size):
+    """Write one moved-aside spool file to the database, then delete it"""
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return 0  # flushed by another process
+    try:
+        # Waits for appends still in progress, or for another flusher
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        if not _same_file(fd, path):
+            return 0
+        with os.fdopen(os.dup(fd), 'rb') as spool_file:
+            lines = spool_file.read().splitlines()
+
+        submissions, rejected = [], []
+        for line in filter(None, lines):
+            try:
+                submissions.append(_submission(json.loads(line)))
+            except (ValueError, KeyError, TypeError):
+                rejected.append(line)
+        if rejected:
+            logger.error('%d unreadable contact submissions in %s kept in %s', len(rejected), path.name, REJECTED)
+            _append(path.parent / REJECTED, b''.join(line + b'\n' for line in rejected))
+
+        # A transaction per batch keeps each hold on the write lock short
+        for start in range(0, len(submissions), batch_size):
+            with transaction.atomic():
+                ContactFormSubmission.objects.bulk_create(
+                    submissions[start:start + batch_size], ignore_conflicts=True
+                )
+        os.unlink(path)
+        return len(submissions)
+    finally:
+        os.close(fd)
+
+
+def flush_spool(batch_size=BATCH_SIZE):
+    """Write every spooled submission to the database and return how many"""
+    directory = spool_dir()
+    incoming = directory / INCOMING
+    try:
+        if incoming.stat().st_size:
+            os.rename(incoming, directory / f'batch-{time.time_ns()}-{os.getpid()}.jsonl')
+            _fsync_dir(directory)
+    except FileNotFoundError:
+        pass
+    # Also picks up batches left behind by a flusher that stopped midway
+    return sum(_flush_batch(path, batch_size) for path in sorted(directory.glob(BATCH_PATTERN)))
+
+
+def pending_submissions():
+    """Number of submissions waiting in the spool"""
+    directory = spool_dir()
+    total = 0
+    for path in [directory / INCOMING, *directory.glob(BATCH_PATTERN)]:
+        try:
+            with open(path, 'rb') as spool_file:
+                total += sum(1 for line in spool_file if line.strip())
+        except FileNotFoundError:
+            pass
+    return total
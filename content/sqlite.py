@@ -0,0 +1,36 @@
+"""
+SQLite connection tuning.
+
+Every new SQLite connection runs the PRAGMAs in the `SQLITE_PRAGMAS` setting.
+The defaults relax fsyncs (`synchronous=NORMAL`), which is durable against
+application crashes though not against power loss, and wait on a busy
+database instead of failing. `journal_mode` is left out of the defaults: it
+is written to the database file itself, so a deployment opts into
+write-ahead logging (readers never wait for a writer) with
+`SQLITE_JOURNAL_MODE=wal` rather than every `manage.py` run rewriting it.
+"""
+from django.conf import settings
+
+
+DEFAULT_PRAGMAS = {
+    'synchronous': 'normal',
+    'busy_timeout': 5000,  # milliseconds
+    'cache_size': -20000,  # negative values are KiB
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+
+def get_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', DEFAULT_PRAGMAS)
+
+
+def apply_pragmas(connection, pragmas=None):
+    """Run `pragmas` (default: the SQLITE_PRAGMAS setting) on a SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = get_pragmas() if pragmas is None else pragmas
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            if connection.is_in_memory_db() and name in ('journal_mode', 'mmap_size'):
+                continue  # not applicable to in-memory test databases
+            cursor.execute(f'PRAGMA {name} = {value}')
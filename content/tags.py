@@ -0,0 +1,126 @@
+"""
+Normalized portfolio tags.
+
+`PortfolioProject.tags` stays the editable JSON list. Every tag in it is
+also stored once as a `PortfolioTag` (identified by its slug, so "3D" and
+"3d" are the same tag) and linked to the project through
+`PortfolioProjectTag`. The `post_save` receiver in `content.signals` keeps
+the links in sync in the writing transaction; bulk writes that bypass
+signals must run `manage.py rebuild_portfolio_tags`.
+"""
+from django.db.models import Count, Exists, OuterRef
+from django.utils.text import slugify
+
+from .models import PortfolioProject, PortfolioProjectTag, PortfolioTag
+
+
+BATCH_SIZE = 1000
+# Tags on at most this many projects are filtered through the tag index
+SELECTIVE_TAG_LIMIT = 500
+
+
+def tag_slug(name):
+    return slugify(str(name))[:PortfolioTag._meta.get_field('slug').max_length]
+
+
+def _normalize(tags):
+    """Return `{slug: name}` for a JSON tag list, keeping the first spelling"""
+    names = {}
+    for name in tags if isinstance(tags, list) else []:
+        slug = tag_slug(name)
+        if slug and slug not in names:
+            names[slug] = str(name).strip()[:PortfolioTag._meta.get_field('name').max_length]
+    return names
+
+
+def _tag_ids(names, using):
+    """Return `{slug: tag id}` for `names`, creating the missing tags"""
+    ids = dict(PortfolioTag.objects.using(using).filter(slug__in=names).values_list('slug', 'pk'))
+    missing = [slug for slug in names if slug not in ids]
+    if missing:
+        # Another transaction may create the same tags concurrently
+        PortfolioTag.objects.using(using).bulk_create(
+            [PortfolioTag(slug=slug, name=names[slug]) for slug in missing], ignore_conflicts=True
+        )
+        ids.update(PortfolioTag.objects.using(using).filter(slug__in=missing).values_list('slug', 'pk'))
+    return ids
+
+
+def sync_project_tags(project, using='default'):
+    """Make the tag links of `project` match its `tags` list"""
+    wanted = set(_tag_ids(_normalize(project.tags), using).values())
+    links = PortfolioProjectTag.objects.using(using).filter(project_id=project.pk)
+    existing = set(links.values_list('tag_id', flat=True))
+    if existing - wanted:
+        links.filter(tag_id__in=existing - wanted).delete()
+    if wanted - existing:
+        PortfolioProjectTag.objects.using(using).bulk_create(
+            [PortfolioProjectTag(project_id=project.pk, tag_id=tag_id) for tag_id in wanted - existing],
+            ignore_conflicts=True
+        )
+
+
+def rebuild_portfolio_tags(using='default'):
+    """Recreate every tag link from the projects' tag lists and drop unused tags"""
+    projects = list(PortfolioProject.objects.using(using).values_list('pk', 'tags'))
+    names = {}
+    for _, tags in projects:
+        for slug, name in _normalize(tags).items():
+            names.setdefault(slug, name)
+    ids = _tag_ids(names, using)
+
+    PortfolioProjectTag.objects.using(using).all().delete()
+    PortfolioProjectTag.objects.using(using).bulk_create([
+        PortfolioProjectTag(project_id=pk, tag_id=ids[slug])
+        for pk, tags in projects
+        for slug in _normalize(tags)
+    ], batch_size=BATCH_SIZE)
+    PortfolioTag.objects.using(using).exclude(slug__in=names).delete()
+    return len(ids)
+
+
+def filter_by_tags(queryset, names, match_all=False):
+    """
+    Restrict a project queryset to those tagged with any (or, with
+    `match_all`, every one) of the tag `names`, matched by slug.
+
+    The plan depends on how many projects carry the tags. Rare tags are
+    looked up through the tag index and the few matching projects sorted;
+    common tags are checked with an EXISTS probe per project while walking
+    the list's ordering index, which stops as soon as a page is filled.
+    Either way a page costs about the same however large the portfolio is.
+    """
+    slugs = {tag_slug(name) for name in names} - {''}
+    counts = dict(
+        PortfolioTag.objects.filter(slug__in=slugs)
+        .annotate(count=Count('project_links'))
+        .values_list('pk', 'count')
+    )
+    if not counts or (match_all and len(counts) < len(slugs)):
+        return queryset.none()
+
+    def tagged(tag_ids):
+        return PortfolioProjectTag.objects.filter(project=OuterRef('pk'), tag_id__in=tag_ids)
+
+    if not match_all:
+        if sum(counts.values()) <= SELECTIVE_TAG_LIMIT:
+            return queryset.filter(pk__in=PortfolioProjectTag.objects.filter(tag_id__in=counts).values('project_id'))
+        return queryset.filter(Exists(tagged(list(counts))))
+
+    rarest = min(counts, key=counts.get)
+    if counts[rarest] <= SELECTIVE_TAG_LIMIT:
+        queryset = queryset.filter(pk__in=PortfolioProjectTag.objects.filter(tag_id=rarest).values('project_id'))
+    for tag_id in counts:
+        if tag_id != rarest or counts[rarest] > SELECTIVE_TAG_LIMIT:
+            queryset = queryset.filter(Exists(tagged([tag_id])))
+    return queryset
+
+
+def tag_catalog():
+    """Return every tag in use with its project count, most used first"""
+    return list(
+        PortfolioTag.objects.annotate(count=Count('project_links'))
+        .filter(count__gt=0)
+        .order_by('-count', 'name')
+        .values('name', 'slug', 'count')
+    )
@@ -1,3 +1,1023 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import shutil
+import tempfile
+import uuid
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from . import media_jobs, slugs, tags
+from .cache import brotli, invalidate_model
+from .generation import bump_generation, get_generation
+from .importer import BundleError, import_bundle
+from .management.commands.link_portfolio_to_services import LinkRule, plan_links
+from .models import (
+    FAQ, ContactFormSubmission, Hero, MediaJob, PortfolioProject, PortfolioProjectTag, PortfolioTag,
+    ServiceCategory, ServiceItem, Stat
+)
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .routers import ReplicaRouter, end_request, mark_replica_synced, start_request
+from .spool import INCOMING, REJECTED, flush_spool, pending_submissions, spool_submission
+from .sqlite import DEFAULT_PRAGMAS
+from .throttling import TokenBucketStore
+
+
+# Tests never touch the shared file cache, and only the throttling tests
+# throttle
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'API_THROTTLING': False,
+}
+
+
+def create_project(title, **fields):
+    return PortfolioProject.objects.create(
+        title=title, description=fields.pop('description', 'Description'), tags=fields.pop('tags', ['3D']), **fields
+    )
+
+
+def create_service(title, **fields):
+    category = fields.pop('category', None) or ServiceCategory.objects.get_or_create(
+        name='Services', defaults={'description': 'Description'}
+    )[0]
+    return ServiceItem.objects.create(
+        category=category, title=title, description=fields.pop('description', 'Description'),
+        features=fields.pop('features', []), **fields
+    )
+
+
+@override_settings(**TEST_SETTINGS)
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Several rows share each `order` value, so the pk tie-breaker matters
+        for index in range(25):
+            create_project(f'Project {index % 5}', order=index % 3)
+        cls.expected = list(
+            PortfolioProject.objects.order_by('order', 'title', 'pk').values_list('pk', flat=True)
+        )
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            pages.append([item['id'] for item in response.json()['results']])
+            url = response.json()[link]
+        return pages
+
+    def test_next_links_visit_every_row_once_in_order(self):
+        pages = self.walk('/api/portfolio/?page_size=10', 'next')
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), self.expected)
+
+    def test_previous_links_walk_back_from_the_last_page(self):
+        url = '/api/portfolio/?page_size=10'
+        for _ in range(2):
+            url = self.client.get(url).json()['next']
+        last_page = self.client.get(url).json()
+        self.assertIsNone(last_page['next'])
+
+        pages = self.walk(last_page['previous'], 'previous')
+        self.assertEqual(sum(reversed(pages), []), self.expected[:20])
+        self.assertEqual([len(page) for page in pages], [10, 10])
+
+    def test_first_page_has_no_previous_link(self):
+        response = self.client.get('/api/portfolio/?page_size=10').json()
+        self.assertIsNone(response['previous'])
+        self.assertIsNotNone(response['next'])
+
+    def test_by_service_rejects_ids_that_are_not_positive_integers(self):
+        for service_id in ('abc', '0', '99999999999999999999'):
+            response = self.client.get(f'/api/portfolio/by-service/{service_id}/')
+            self.assertEqual(response.status_code, 400, service_id)
+            self.assertEqual(response.json(), {'error': 'Service ID must be a positive integer'})
+        self.assertEqual(self.client.get('/api/portfolio/by-service/12345/').json()['results'], [])
+
+    def test_invalid_cursor_is_a_404(self):
+        for cursor in ('not-base64!', 'eyJ2IjpbMV19', 'e30'):
+            response = self.client.get(f'/api/portfolio/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, cursor)
+            self.assertEqual(response.json()['detail'], 'Invalid cursor')
+
+
+class EmptyCacheMixin:
+    # The locmem cache outlives the rows each test rolls back
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class TemporaryDirectoryMixin:
+    def setUp(self):
+        super().setUp()
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+
+class TokenBucketStoreTests(TemporaryDirectoryMixin, TestCase):
+    def test_bucket_allows_bursts_then_refills_at_the_rate(self):
+        store = TokenBucketStore(self.directory / 'throttle.sqlite3')
+        take = lambda now: store.take('key', capacity=2, rate=1, now=now)
+        self.assertEqual(take(100), (True, 1))
+        self.assertEqual(take(100), (True, 0))
+        self.assertEqual(take(100), (False, 0))
+        # Denied requests do not go into debt
+        self.assertEqual(take(100.5), (False, 0.5))
+        self.assertTrue(take(101)[0])
+        # Never more than `capacity` tokens, however long the bucket was idle
+        self.assertEqual(take(1000), (True, 1))
+
+    def test_buckets_are_independent(self):
+        store = TokenBucketStore(self.directory / 'throttle.sqlite3')
+        self.assertTrue(store.take('a', capacity=1, rate=1, now=0)[0])
+        self.assertFalse(store.take('a', capacity=1, rate=1, now=0)[0])
+        self.assertTrue(store.take('b', capacity=1, rate=1, now=0)[0])
+
+
+class ThrottlingTests(TemporaryDirectoryMixin, TestCase):
+    data = {'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hello'}
+
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(**{
+            **TEST_SETTINGS, 'API_THROTTLING': True, 'API_THROTTLE_STORE': self.directory / 'throttle.sqlite3',
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def submit(self, **extra):
+        return self.client.post('/api/contact-form/', self.data, content_type='application/json', **extra)
+
+    def test_contact_form_answers_429_with_retry_after_once_the_bucket_is_empty(self):
+        # contact_form allows a burst of 10 an hour
+        for _ in range(10):
+            self.assertEqual(self.submit().status_code, 201)
+        response = self.submit()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '360')
+        self.assertEqual(ContactFormSubmission.objects.count(), 10)
+
+    def test_limits_are_per_client_ip(self):
+        for _ in range(11):
+            self.submit(REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.submit(REMOTE_ADDR='10.0.0.1').status_code, 429)
+        self.assertEqual(self.submit(REMOTE_ADDR='10.0.0.2').status_code, 201)
+
+    def test_endpoint_scope_only_applies_to_its_views(self):
+        for _ in range(11):
+            self.submit()
+        self.assertEqual(self.client.get('/api/faqs/').status_code, 200)
+
+    def test_throttled_requests_are_not_routed(self):
+        # Routing a read may refresh the in-memory copy of the database
+        with mock.patch.object(TokenBucketStore, 'take', return_value=(False, 0)), \
+                mock.patch('content.mixins.start_request') as start_request:
+            self.assertEqual(self.client.get('/api/portfolio/').status_code, 429)
+        start_request.assert_not_called()
+
+    def test_unreachable_store_lets_requests_through(self):
+        with override_settings(API_THROTTLE_STORE=self.directory / 'missing' / 'throttle.sqlite3'), \
+                self.assertLogs('content.throttling', 'WARNING'):
+            self.assertEqual(self.submit().status_code, 201)
+
+
+class ContactSpoolTests(TemporaryDirectoryMixin, TestCase):
+    data = {'name': 'Ada', 'email': 'ada@example.com', 'message': 'Hello'}
+
+    def setUp(self):
+        super().setUp()
+        settings = override_settings(**{
+            **TEST_SETTINGS, 'CONTACT_SUBMISSIONS_BUFFERED': True, 'CONTACT_SPOOL_DIR': self.directory,
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_buffered_submission_is_acknowledged_then_saved_by_the_flush(self):
+        response = self.client.post('/api/contact-form/', self.data, content_type='application/json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ContactFormSubmission.objects.count(), 0)
+        self.assertEqual(pending_submissions(), 1)
+
+        self.assertEqual(flush_spool(), 1)
+        submission = ContactFormSubmission.objects.get()
+        self.assertEqual((submission.name, submission.email, submission.message), ('Ada', 'ada@example.com', 'Hello'))
+        self.assertIsNotNone(submission.spool_id)
+        self.assertEqual(pending_submissions(), 0)
+
+    def test_invalid_submission_is_not_spooled(self):
+        response = self.client.post('/api/contact-form/', {'name': 'Ada'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(pending_submissions(), 0)
+
+    def test_replaying_a_flushed_batch_saves_nothing_twice(self):
+        for index in range(3):
+            spool_submission({**self.data, 'name': f'Ada {index}'})
+        # A flusher that stopped after saving but before deleting its batch
+        # leaves the batch to be flushed again
+        batch = (self.directory / INCOMING).read_bytes()
+        self.assertEqual(flush_spool(batch_size=2), 3)
+        (self.directory / 'batch-0-0.jsonl').write_bytes(batch)
+
+        flush_spool()
+        self.assertEqual(ContactFormSubmission.objects.count(), 3)
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_unreadable_lines_are_kept_aside(self):
+        spool_submission(self.data)
+        with open(self.directory / INCOMING, 'ab') as spool_file:
+            spool_file.write(b'{not json\n')
+
+        with self.assertLogs('content.spool', 'ERROR'):
+            self.assertEqual(flush_spool(), 1)
+        self.assertEqual((self.directory / REJECTED).read_bytes(), b'{not json\n')
+
+
+@override_settings(**TEST_SETTINGS)
+class ImportBundleTests(TestCase):
+    def bundle(self, **changes):
+        bundle = {
+            'hero': {'title': 'Immersive', 'subtitle': 'Studio', 'cta_text': 'Go', 'cta_link': 'https://example.com/'},
+            'service_categories': [{'name': 'Animation', 'description': 'Motion work'}],
+            'services': [{'category': 'Animation', 'title': '3D Animation', 'description': 'Renders', 'features': ['Rigging']}],
+            'portfolio': [
+                {'title': 'Launch Film', 'description': 'Film', 'tags': ['3D'], 'service': '3D Animation'},
+                {'title': 'Brand Refresh', 'description': 'Logos', 'tags': ['Brand']},
+            ],
+        }
+        bundle.update(changes)
+        return bundle
+
+    def counts(self, reports):
+        return {
+            report.name: tuple(len(getattr(report, kind)) for kind in ('created', 'updated', 'unchanged', 'deleted'))
+            for report in reports
+        }
+
+    def test_import_creates_rows_and_relations(self):
+        reports = import_bundle(self.bundle())
+        self.assertEqual(self.counts(reports), {
+            'hero': (1, 0, 0, 0),
+            'service_categories': (1, 0, 0, 0),
+            'services': (1, 0, 0, 0),
+            'portfolio': (2, 0, 0, 0),
+        })
+        project = PortfolioProject.objects.get(title='Launch Film')
+        self.assertEqual(project.slug, 'launch-film')
+        self.assertEqual(project.service, ServiceItem.objects.get(category__name='Animation', title='3D Animation'))
+        self.assertEqual(set(PortfolioTag.objects.values_list('slug', flat=True)), {'3d', 'brand'})
+
+    def test_reimport_changes_nothing(self):
+        import_bundle(self.bundle())
+        reports = import_bundle(self.bundle())
+        self.assertEqual(self.counts(reports)['portfolio'], (0, 0, 2, 0))
+        self.assertEqual(self.counts(reports)['hero'], (0, 0, 1, 0))
+
+    def test_changed_fields_are_updated(self):
+        import_bundle(self.bundle())
+        bundle = self.bundle(hero={**self.bundle()['hero'], 'title': 'New title'})
+        bundle['portfolio'][0]['description'] = 'Updated'
+        reports = {report.name: report for report in import_bundle(bundle)}
+
+        instance, changes = reports['portfolio'].updated[0]
+        self.assertEqual((instance.title, changes), ('Launch Film', ['description']))
+        self.assertEqual(PortfolioProject.objects.get(title='Launch Film').description, 'Updated')
+        self.assertEqual(Hero.objects.get().title, 'New title')
+        self.assertEqual(Hero.objects.count(), 1)
+
+    def test_prune_deletes_rows_missing_from_the_bundle(self):
+        import_bundle(self.bundle())
+        bundle = self.bundle()
+        bundle['portfolio'] = bundle['portfolio'][:1]
+
+        import_bundle(bundle)
+        self.assertEqual(PortfolioProject.objects.count(), 2)
+        reports = import_bundle(bundle, prune=True)
+        self.assertEqual(self.counts(reports)['portfolio'], (0, 0, 1, 1))
+        self.assertEqual(list(PortfolioProject.objects.values_list('title', flat=True)), ['Launch Film'])
+
+    def test_dry_run_writes_nothing(self):
+        reports = import_bundle(self.bundle(), dry_run=True)
+        self.assertEqual(self.counts(reports)['portfolio'], (2, 0, 0, 0))
+        self.assertFalse(PortfolioProject.objects.exists())
+        self.assertFalse(ServiceCategory.objects.exists())
+
+    def test_duplicate_existing_titles_are_rejected(self):
+        create_project('Launch Film')
+        create_project('Launch Film')
+        with self.assertRaisesMessage(BundleError, 'matches 2 existing rows'):
+            import_bundle(self.bundle())
+        # Pruning would silently skip one of the duplicates
+        bundle = self.bundle(portfolio=[self.bundle()['portfolio'][1]])
+        with self.assertRaisesMessage(BundleError, 'cannot prune'):
+            import_bundle(bundle, prune=True)
+        self.assertFalse(ServiceCategory.objects.exists())
+
+    def test_invalid_rows_roll_back_the_whole_import(self):
+        bundle = self.bundle()
+        bundle['portfolio'][1]['service'] = 'Unknown service'
+        with self.assertRaisesMessage(BundleError, 'portfolio[1].service'):
+            import_bundle(bundle)
+        self.assertFalse(ServiceCategory.objects.exists())
+        self.assertFalse(Hero.objects.exists())
+
+
+@override_settings(**TEST_SETTINGS)
+class SlugAllocationTests(TestCase):
+    def test_same_titles_get_the_first_free_suffix(self):
+        slugs_taken = [create_project('Launch').slug for _ in range(3)]
+        self.assertEqual(slugs_taken, ['launch', 'launch-1', 'launch-2'])
+        PortfolioProject.objects.filter(slug='launch-1').delete()
+        self.assertEqual(create_project('Launch').slug, 'launch-1')
+
+    def test_conflicting_save_allocates_again(self):
+        create_project('Launch')
+        real_next_free_slug = slugs.next_free_slug
+        calls = []
+
+        def stale_then_real(*args, **kwargs):
+            # The first read misses the row a concurrent save just inserted
+            calls.append(args)
+            return 'launch' if len(calls) == 1 else real_next_free_slug(*args, **kwargs)
+
+        with mock.patch.object(slugs, 'next_free_slug', side_effect=stale_then_real):
+            project = create_project('Launch')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(project.slug, 'launch-1')
+        self.assertEqual(PortfolioProject.objects.filter(slug='launch-1').count(), 1)
+
+    def test_gives_up_after_the_attempt_limit(self):
+        create_project('Launch')
+        with mock.patch.object(slugs, 'next_free_slug', return_value='launch') as next_free_slug:
+            with self.assertRaises(IntegrityError):
+                create_project('Launch')
+        self.assertEqual(next_free_slug.call_count, slugs.SLUG_ATTEMPTS)
+        self.assertEqual(PortfolioProject.objects.count(), 1)
+
+    def test_assign_slugs_allocates_from_one_read(self):
+        create_project('Launch')
+        projects = [PortfolioProject(title='Launch'), PortfolioProject(title='Launch'), PortfolioProject(title='!!!')]
+        with self.assertNumQueries(1):
+            slugs.assign_slugs(projects)
+        self.assertEqual([project.slug for project in projects], ['launch-1', 'launch-2', 'portfolioproject'])
+
+
+class SqlitePragmaTests(TemporaryDirectoryMixin, SimpleTestCase):
+    def open_connection(self, name):
+        # A new connection to a file, as a worker opens one
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': str(self.directory / name)}, alias=name)
+        self.addCleanup(wrapper.close)
+        wrapper.ensure_connection()
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={**DEFAULT_PRAGMAS, 'journal_mode': 'wal', 'busy_timeout': 1234})
+    def test_configured_pragmas_take_effect_on_new_connections(self):
+        wrapper = self.open_connection('tuned.sqlite3')
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 1234)
+
+    @override_settings(SQLITE_PRAGMAS=DEFAULT_PRAGMAS)
+    def test_journal_mode_is_left_alone_unless_configured(self):
+        wrapper = self.open_connection('untouched.sqlite3')
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), DEFAULT_PRAGMAS['busy_timeout'])
+
+
+@override_settings(**TEST_SETTINGS)
+class LinkPortfolioToServicesTests(TestCase):
+    def setUp(self):
+        self.animation = create_service('3D Animation')
+        self.brand = create_service('Brand Identity')
+
+    def test_title_rules_take_precedence_over_tag_rules_in_rule_order(self):
+        rules = (
+            LinkRule('Animation', titles=('film',), tags=('3d',)),
+            LinkRule('Brand', titles=('brand film',), tags=('brand', '3d')),
+            LinkRule('Missing service', titles=('logo',), tags=('logo',)),
+        )
+        brand_film = create_project('Brand Film', tags=['Brand'])
+        both_tags = create_project('Logo Pack', tags=['Brand', '3D Animation'])
+        brand_tag = create_project('Poster', tags=['Brand'])
+        create_project('Unmatched', tags=['Photography'])
+        create_project('Linked Film', tags=['3D'], service=self.brand)
+
+        plan = plan_links(rules)
+        self.assertEqual(plan, {
+            (self.animation.pk, '3D Animation'): [
+                (brand_film.pk, 'Brand Film', False),
+                # Tags are matched through the normalized tag table
+                (both_tags.pk, 'Logo Pack', True),
+            ],
+            (self.brand.pk, 'Brand Identity'): [(brand_tag.pk, 'Poster', True)],
+        })
+
+    def test_dry_run_writes_nothing(self):
+        project = create_project('Logo Pack', tags=['Logo'])
+        output = StringIO()
+        call_command('link_portfolio_to_services', dry_run=True, stdout=output)
+        self.assertIn('1 portfolio projects would be linked', output.getvalue())
+        project.refresh_from_db()
+        self.assertIsNone(project.service)
+
+        call_command('link_portfolio_to_services', stdout=StringIO())
+        project.refresh_from_db()
+        self.assertEqual(project.service, self.brand)
+
+
+@override_settings(**TEST_SETTINGS)
+class ResponseCacheInvalidationTests(EmptyCacheMixin, TestCase):
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_saving_a_row_evicts_the_cached_list(self):
+        stat = Stat.objects.create(title='Projects', number=10, suffix='+')
+        self.assertEqual(self.get('/api/stats/')['X-Cache'], 'MISS')
+        self.assertEqual(self.get('/api/stats/')['X-Cache'], 'HIT')
+
+        stat.number = 20
+        with self.captureOnCommitCallbacks(execute=True):
+            stat.save()
+        response = self.get('/api/stats/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([item['number'] for item in response.json()], [20])
+
+    def test_deleting_a_row_evicts_the_cached_list(self):
+        stats = [Stat.objects.create(title=title, number=1, suffix='') for title in ('A', 'B')]
+        self.get('/api/stats/')
+        with self.captureOnCommitCallbacks(execute=True):
+            stats[0].delete()
+        self.assertEqual([item['title'] for item in self.get('/api/stats/').json()], ['B'])
+
+    def test_changes_to_a_dependency_evict_the_cached_response(self):
+        service = create_service('Animation')
+        create_project('Launch Film', service=service, is_featured=True)
+        self.assertEqual(self.get('/api/portfolio/featured/').json()[0]['service_name'], 'Animation')
+
+        service.title = '3D Animation'
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+        self.assertEqual(self.get('/api/portfolio/featured/').json()[0]['service_name'], '3D Animation')
+
+    def test_bulk_updates_are_evicted_by_invalidate_model(self):
+        create_project('Launch Film', is_featured=True)
+        self.assertEqual(len(self.get('/api/portfolio/featured/').json()), 1)
+
+        # update() sends no signals, so the stale response is still served...
+        PortfolioProject.objects.update(is_featured=False)
+        self.assertEqual(self.get('/api/portfolio/featured/')['X-Cache'], 'HIT')
+        # ...until the writer evicts it
+        invalidate_model(PortfolioProject)
+        response = self.get('/api/portfolio/featured/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json(), [])
+
+    def test_changes_are_only_published_on_commit(self):
+        stat = Stat.objects.create(title='Projects', number=10, suffix='+')
+        self.get('/api/stats/')
+        with self.captureOnCommitCallbacks() as callbacks:
+            stat.number = 20
+            stat.save()
+            self.assertEqual(self.get('/api/stats/')['X-Cache'], 'HIT')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.get('/api/stats/').json()[0]['number'], 20)
+
+
+@override_settings(**TEST_SETTINGS)
+class ResponseEncodingTests(EmptyCacheMixin, TestCase):
+    url = '/api/stats/'
+
+    def setUp(self):
+        super().setUp()
+        for index in range(20):
+            Stat.objects.create(title=f'Stat {index}', number=index, suffix='+')
+
+    def get(self, accept_encoding=None):
+        extra = {'HTTP_ACCEPT_ENCODING': accept_encoding} if accept_encoding is not None else {}
+        response = self.client.get(self.url, **extra)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        return response
+
+    def assert_encoded(self, response, encoding, decompress):
+        identity = self.get()
+        self.assertEqual(response['Content-Encoding'], encoding)
+        self.assertEqual(decompress(response.content), identity.content)
+        # Every encoding shares the validators, which makes them weak
+        self.assertEqual(response['ETag'], f'W/{identity["ETag"]}')
+
+    def test_gzip_is_served_on_miss_and_hit(self):
+        for expected in ('MISS', 'HIT'):
+            response = self.get('gzip, deflate')
+            self.assertEqual(response['X-Cache'], expected)
+            self.assert_encoded(response, 'gzip', gzip.decompress)
+
+    @skipUnless(brotli, 'needs the Brotli package')
+    def test_brotli_is_preferred_when_accepted(self):
+        for expected in ('MISS', 'HIT'):
+            response = self.get('gzip, br')
+            self.assertEqual(response['X-Cache'], expected)
+            self.assert_encoded(response, 'br', brotli.decompress)
+
+    def test_compressed_bodies_are_never_served_without_accept_encoding(self):
+        self.assertEqual(self.get('gzip')['X-Cache'], 'MISS')
+        for accept_encoding in (None, '', 'identity', 'gzip;q=0', 'compress'):
+            response = self.get(accept_encoding)
+            self.assertEqual(response['X-Cache'], 'HIT')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertFalse(response['ETag'].startswith('W/'))
+            self.assertEqual(len(response.json()), 20)
+
+
+@override_settings(**TEST_SETTINGS)
+class ConditionalGetTests(EmptyCacheMixin, TestCase):
+    url = '/api/faqs/'
+
+    def setUp(self):
+        super().setUp()
+        self.faqs = [FAQ.objects.create(question=f'Question {index}', answer='Answer') for index in range(3)]
+
+    def get(self, **headers):
+        return self.client.get(self.url, **{f'HTTP_{name.upper()}': value for name, value in headers.items()})
+
+    def save(self, instance):
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+
+    def test_matching_validators_answer_304(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get(if_none_match=response['ETag']).status_code, 304)
+        self.assertEqual(self.get(if_modified_since=response['Last-Modified']).status_code, 304)
+        self.assertEqual(self.get(if_none_match='"other"').status_code, 200)
+
+    def test_saving_a_row_changes_the_etag(self):
+        etag = self.get()['ETag']
+        self.faqs[0].answer = 'Changed'
+        self.save(self.faqs[0])
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_deleting_a_row_changes_the_etag(self):
+        etag = self.get()['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faqs[0].delete()
+        self.assertEqual(self.get(if_none_match=etag).status_code, 200)
+
+    def test_delete_and_add_with_the_same_count_and_last_update_changes_the_etag(self):
+        etag = self.get()['ETag']
+        # An import that keeps its timestamps: count and MAX(updated_at) stay
+        # the same, only the per-model change time moves
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faqs[0].delete()
+            added = FAQ.objects.create(question='Imported', answer='Answer')
+            FAQ.objects.filter(pk=added.pk).update(updated_at=self.faqs[0].updated_at)
+        self.assertEqual(FAQ.objects.count(), 3)
+        response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(**TEST_SETTINGS)
+class TagFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.film = create_project('Film', tags=['3D', 'Animation'])
+        cls.mascot = create_project('Mascot', tags=['3d', 'Character'])
+        cls.logo = create_project('Logo', tags=['Brand'])
+
+    def filter(self, names, match_all=False):
+        return tags.filter_by_tags(PortfolioProject.objects.all(), names, match_all=match_all)
+
+    def titles(self, names, match_all=False):
+        return sorted(self.filter(names, match_all).values_list('title', flat=True))
+
+    def test_selective_tags_are_looked_up_through_the_tag_index(self):
+        self.assertEqual(self.titles(['3D', 'Brand']), ['Film', 'Logo', 'Mascot'])
+        query = str(self.filter(['3D', 'Brand']).query)
+        self.assertIn(' IN (SELECT', query)
+        self.assertNotIn('EXISTS', query)
+        self.assertEqual(self.titles(['3D', 'animation'], match_all=True), ['Film'])
+        # The rarest tag narrows the rows through the index, the others are probed
+        query = str(self.filter(['3D', 'animation'], match_all=True).query)
+        self.assertEqual((query.count(' IN (SELECT'), query.count('EXISTS')), (1, 1))
+
+    def test_common_tags_are_probed_per_project(self):
+        with mock.patch.object(tags, 'SELECTIVE_TAG_LIMIT', 0):
+            self.assertEqual(self.titles(['3D', 'Brand']), ['Film', 'Logo', 'Mascot'])
+            self.assertEqual(self.titles(['3D', 'animation'], match_all=True), ['Film'])
+            for match_all in (False, True):
+                query = str(self.filter(['3D', 'animation'], match_all).query)
+                self.assertNotIn(' IN (SELECT', query)
+                self.assertIn('EXISTS', query)
+
+    def test_unknown_tags(self):
+        self.assertEqual(self.titles(['Unknown']), [])
+        self.assertEqual(self.titles(['3D', 'Unknown']), ['Film', 'Mascot'])
+        self.assertEqual(self.titles(['3D', 'Unknown'], match_all=True), [])
+
+    def test_list_filters(self):
+        response = self.client.get('/api/portfolio/?tag=3d&tag=character&tag_match=all')
+        self.assertEqual([item['title'] for item in response.json()['results']], ['Mascot'])
+        self.assertEqual(self.client.get('/api/portfolio/?tag=3d&tag_match=some').status_code, 400)
+
+    def test_rebuild_recreates_links_and_drops_unused_tags(self):
+        # Bulk writes skip the signal that keeps the links in sync
+        PortfolioProject.objects.filter(pk=self.logo.pk).update(tags=['Identity', 'brand'])
+        PortfolioProject.objects.filter(pk=self.mascot.pk).update(tags=[])
+        PortfolioProjectTag.objects.filter(project=self.film).delete()
+
+        self.assertEqual(tags.rebuild_portfolio_tags(), 4)
+        self.assertEqual(
+            set(PortfolioProjectTag.objects.values_list('project__title', 'tag__slug')),
+            {('Film', '3d'), ('Film', 'animation'), ('Logo', 'identity'), ('Logo', 'brand')},
+        )
+        self.assertEqual(set(PortfolioTag.objects.values_list('slug', flat=True)), {'3d', 'animation', 'identity', 'brand'})
+
+
+@override_settings(**TEST_SETTINGS)
+class SearchTests(TestCase):
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(result['type'], result['item']['id']) for result in response.json()['results']]
+
+    def test_same_pk_in_every_type_gets_its_own_document(self):
+        project = create_project('Orbit launch', pk=1000)
+        service = create_service('Orbit design', pk=1000)
+        faq = FAQ.objects.create(pk=1000, question='What is Orbit?', answer='A studio')
+        self.assertCountEqual(self.search('orbit'), [('portfolio', 1000), ('service', 1000), ('faq', 1000)])
+        self.assertCountEqual(self.search('orbit', type='service,faq'), [('service', 1000), ('faq', 1000)])
+        self.assertEqual(self.search('orbit', type='faq'), [('faq', faq.pk)])
+
+        project.delete()
+        self.assertCountEqual(self.search('orbit'), [('service', service.pk), ('faq', faq.pk)])
+
+    def test_titles_rank_above_body_text(self):
+        body = create_project('Brand Refresh', description='Includes a short launch teaser')
+        title = create_project('Launch Film', description='A film')
+        self.assertEqual(self.search('launch'), [('portfolio', title.pk), ('portfolio', body.pk)])
+
+    def test_only_the_last_term_matches_as_a_prefix(self):
+        project = create_project('Studio mascot', tags=['Character'])
+        self.assertEqual(self.search('masc'), [('portfolio', project.pk)])
+        self.assertEqual(self.search('mascot charac'), [('portfolio', project.pk)])
+        self.assertEqual(self.search('masc character'), [])
+        # Search syntax in the input is matched as plain words
+        self.assertEqual(self.search('mascot OR "NEAR(*'), [])
+
+    def test_saving_and_deleting_rows_update_the_index(self):
+        project = create_project('Launch Film')
+        self.assertEqual(self.search('launch'), [('portfolio', project.pk)])
+
+        project.title = 'Orbit Reel'
+        project.save()
+        self.assertEqual(self.search('launch'), [])
+        self.assertEqual(self.search('orbit'), [('portfolio', project.pk)])
+
+        project.delete()
+        self.assertEqual(self.search('orbit'), [])
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/search/').status_code, 400)
+        response = self.client.get('/api/search/', {'q': 'launch', 'type': 'portfolio,blog'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Unknown type: blog', response.json()['error'])
+
+
+@override_settings(**TEST_SETTINGS, DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRouterTests(EmptyCacheMixin, SimpleTestCase):
+    router = ReplicaRouter()
+
+    def start(self, read_only=True):
+        state = start_request(read_only)
+        self.addCleanup(end_request, state)
+        return state
+
+    def read(self):
+        return self.router.db_for_read(PortfolioProject)
+
+    def test_reads_use_a_synced_replica_until_the_request_writes(self):
+        mark_replica_synced('replica1', get_generation())
+        self.start()
+        self.assertEqual(self.read(), 'replica1')
+        self.assertEqual(self.router.db_for_write(ContactFormSubmission), 'default')
+        # The request must see its own write
+        self.assertEqual(self.read(), 'default')
+
+    def test_pinning_ends_with_the_request(self):
+        mark_replica_synced('replica1', get_generation())
+        state = start_request(True)
+        self.router.db_for_write(PortfolioProject)
+        end_request(state)
+        self.assertEqual(self.read(), 'default')  # outside any request
+        self.start()
+        self.assertEqual(self.read(), 'replica1')
+
+    def test_requests_that_may_write_use_the_primary(self):
+        mark_replica_synced('replica1', get_generation())
+        self.start(read_only=False)
+        self.assertEqual(self.read(), 'default')
+
+    def test_replicas_behind_the_current_generation_are_never_chosen(self):
+        generation = get_generation()
+        mark_replica_synced('replica1', generation)
+        mark_replica_synced('replica2', generation)
+        bump_generation()
+        mark_replica_synced('replica2', get_generation())
+        for _ in range(20):
+            self.start()
+            self.assertEqual(self.read(), 'replica2')
+
+        bump_generation()
+        self.start()
+        self.assertEqual(self.read(), 'default')
+
+    @override_settings(DATABASE_REPLICA_CHECK_GENERATION=False)
+    def test_generation_check_can_be_disabled(self):
+        self.start()
+        self.assertIn(self.read(), ('replica1', 'replica2'))
+
+
+@override_settings(**TEST_SETTINGS)
+class SingletonContentTests(EmptyCacheMixin, TestCase):
+    fields = {'title': 'Immersive', 'subtitle': 'Studio', 'cta_text': 'Go', 'cta_link': 'https://example.com/'}
+
+    def current(self):
+        return self.client.get('/api/hero/current/')
+
+    def test_current_copy_is_refreshed_after_a_committed_save(self):
+        self.assertEqual(self.current().json(), {'message': 'No hero content found'})
+        with self.captureOnCommitCallbacks(execute=True):
+            hero = Hero.objects.create(**self.fields)
+        self.assertEqual(self.current().json()['title'], 'Immersive')
+
+        hero.title = 'Cinematic'
+        with self.captureOnCommitCallbacks(execute=True):
+            hero.save()
+        self.assertEqual(self.current().json()['title'], 'Cinematic')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            hero.delete()
+        self.assertEqual(self.current().status_code, 404)
+
+    def test_the_copy_is_kept_until_the_generation_moves_on(self):
+        Hero.objects.create(**self.fields)
+        self.assertEqual(self.current().json()['title'], 'Immersive')
+        Hero.objects.update(title='Cinematic')
+        self.assertEqual(self.current().json()['title'], 'Immersive')
+        bump_generation()
+        self.assertEqual(self.current().json()['title'], 'Cinematic')
+
+    def test_creating_a_second_row_through_the_api_is_rejected(self):
+        self.assertEqual(self.client.post('/api/hero/', self.fields, content_type='application/json').status_code, 201)
+        response = self.client.post('/api/hero/', self.fields, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), ['Hero Section already exists, edit the existing entry instead'])
+        self.assertEqual(Hero.objects.count(), 1)
+
+    def test_second_row_is_rejected_by_clean_and_save(self):
+        hero = Hero.objects.create(**self.fields)
+        second = Hero(**self.fields)
+        with self.assertRaisesMessage(ValidationError, 'already exists'):
+            second.full_clean()
+        with self.assertRaisesMessage(ValidationError, 'already exists'):
+            second.save()
+        # Editing the existing row is fine
+        hero.title = 'Cinematic'
+        hero.full_clean()
+        hero.save()
+        self.assertEqual(Hero.objects.get().title, 'Cinematic')
+
+
+@override_settings(**TEST_SETTINGS)
+class SiteSnapshotTests(EmptyCacheMixin, TestCase):
+    url = '/api/site/snapshot/'
+
+    def setUp(self):
+        super().setUp()
+        self.faq = FAQ.objects.create(question='What do you make?', answer='Films', is_featured=True)
+
+    def test_snapshot_carries_its_version(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        version = response.json()['version']
+        self.assertEqual(response['X-Content-Version'], str(version))
+        self.assertEqual(response['ETag'], f'"snapshot-{version}"')
+        self.assertEqual([faq['question'] for faq in response.json()['faqs']], ['What do you make?'])
+
+    def test_unchanged_snapshot_answers_304(self):
+        response = self.client.get(self.url)
+        version = response['X-Content-Version']
+        self.assertEqual(self.client.get(self.url, {'since': version}).status_code, 304)
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+    def test_snapshot_is_rebuilt_after_a_change(self):
+        response = self.client.get(self.url)
+        self.faq.question = 'What do you build?'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.faq.save()
+
+        for headers in ({'data': {'since': response['X-Content-Version']}}, {'HTTP_IF_NONE_MATCH': response['ETag']}):
+            changed = self.client.get(self.url, **headers)
+            self.assertEqual(changed.status_code, 200)
+            self.assertNotEqual(changed['ETag'], response['ETag'])
+            self.assertEqual(changed.json()['version'], int(changed['X-Content-Version']))
+            self.assertEqual([faq['question'] for faq in changed.json()['faqs']], ['What do you build?'])
+
+
+class InlinePool:
+    """Stands in for the worker's process pool, running jobs in the test process"""
+
+    def __init__(self, crashing=()):
+        self.crashing = crashing
+        self.shut_down = False
+
+    def map(self, function, job_ids):
+        for job_id in job_ids:
+            if job_id in self.crashing:
+                raise BrokenProcessPool('A process in the process pool was terminated abruptly')
+            yield function(job_id)
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+@override_settings(**TEST_SETTINGS, MEDIA_JOB_RETRY_DELAY=30)
+class MediaJobTests(TestCase):
+    def setUp(self):
+        self.faq = FAQ.objects.create(question='Question', answer='Answer')
+
+    def create_job(self, **fields):
+        return MediaJob.objects.create(
+            content_type=ContentType.objects.get_for_model(FAQ), object_id=self.faq.pk,
+            kind=MediaJob.KIND_PROBE, field_name='file', **fields
+        )
+
+    def run_worker(self, crashing=()):
+        pools = []
+
+        def create_pool(**kwargs):
+            pools.append(InlinePool(crashing))
+            return pools[-1]
+
+        with mock.patch('content.management.commands.run_media_worker.ProcessPoolExecutor', create_pool):
+            call_command('run_media_worker', once=True, stdout=StringIO())
+        self.assertTrue(all(pool.shut_down for pool in pools))
+        return pools
+
+    def test_failed_jobs_are_retried_with_backoff_then_failed(self):
+        job = self.create_job()
+        with mock.patch.object(media_jobs, 'run_job', side_effect=OSError('unreadable file')), \
+                self.assertLogs('content.media_jobs', 'ERROR'):
+            for attempt, delay in ((1, 30), (2, 60)):
+                self.assertTrue(media_jobs.claim_job(job.pk))
+                started = timezone.now()
+                self.assertEqual(media_jobs.process_job(job.pk), MediaJob.STATUS_PENDING)
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+                self.assertAlmostEqual(job.run_after - started, timedelta(seconds=delay), delta=timedelta(seconds=1))
+            # Not due yet
+            self.assertEqual(media_jobs.claim_jobs(10), [])
+
+            self.assertTrue(media_jobs.claim_job(job.pk))
+            self.assertEqual(media_jobs.process_job(job.pk), MediaJob.STATUS_FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 3)
+        self.assertIsNotNone(job.finished_at)
+        self.assertIn('OSError: unreadable file', job.last_error)
+
+    @override_settings(MEDIA_JOB_RETRY_DELAY=0)
+    def test_worker_runs_failing_jobs_until_their_attempts_are_used_up(self):
+        failing, working = self.create_job(), self.create_job()
+
+        def run_job(job):
+            if job.pk == failing.pk:
+                raise OSError('unreadable file')
+            return {'type': 'image'}
+
+        with mock.patch.object(media_jobs, 'run_job', side_effect=run_job), \
+                self.assertLogs('content.media_jobs', 'ERROR'):
+            self.run_worker()
+        failing.refresh_from_db()
+        working.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (MediaJob.STATUS_FAILED, 3))
+        self.assertEqual((working.status, working.attempts, working.result), (MediaJob.STATUS_DONE, 1, {'type': 'image'}))
+
+    def test_worker_survives_jobs_that_crash_its_processes(self):
+        crashing, working = self.create_job(), self.create_job()
+        with mock.patch.object(media_jobs, 'run_job', return_value={'type': 'image'}):
+            pools = self.run_worker(crashing=[crashing.pk])
+        # The shared batch crashes once, then the crashing job alone for each
+        # of its attempts; every crash replaces the pool
+        self.assertEqual(len(pools), 5)
+        crashing.refresh_from_db()
+        working.refresh_from_db()
+        self.assertEqual((crashing.status, crashing.attempts), (MediaJob.STATUS_FAILED, 3))
+        self.assertEqual(crashing.last_error, 'Worker process crashed')
+        # The job that shared its batch is not charged for the crash
+        self.assertEqual((working.status, working.attempts), (MediaJob.STATUS_DONE, 1))
+
+    def test_crashed_batches_are_requeued_without_using_an_attempt(self):
+        jobs = [self.create_job(), self.create_job(attempts=2)]
+        for job in jobs:
+            media_jobs.claim_job(job.pk)
+        self.assertEqual(media_jobs.requeue_crashed_batch([job.pk for job in jobs]), 2)
+        self.assertEqual(
+            [(job.status, job.attempts) for job in MediaJob.objects.filter(pk__in=[job.pk for job in jobs]).order_by('pk')],
+            [(MediaJob.STATUS_PENDING, 0), (MediaJob.STATUS_PENDING, 2)],
+        )
+
+    def test_crashed_jobs_are_requeued_while_attempts_remain(self):
+        jobs = [self.create_job(), self.create_job(attempts=2)]
+        for job in jobs:
+            media_jobs.claim_job(job.pk)
+        self.assertEqual(media_jobs.release_crashed_jobs([job.pk for job in jobs]), (1, 1))
+        statuses = [MediaJob.objects.get(pk=job.pk).status for job in jobs]
+        self.assertEqual(statuses, [MediaJob.STATUS_PENDING, MediaJob.STATUS_FAILED])
+
+    @override_settings(MEDIA_JOB_TIMEOUT=60)
+    def test_stale_running_jobs_are_released(self):
+        stale = self.create_job(status=MediaJob.STATUS_RUNNING, attempts=1, started_at=timezone.now() - timedelta(minutes=5))
+        recent = self.create_job(status=MediaJob.STATUS_RUNNING, attempts=1, started_at=timezone.now())
+        self.assertEqual(media_jobs.reset_stale_jobs(), (1, 0))
+        self.assertEqual(MediaJob.objects.get(pk=stale.pk).status, MediaJob.STATUS_PENDING)
+        self.assertEqual(MediaJob.objects.get(pk=recent.pk).status, MediaJob.STATUS_RUNNING)
+
+
+class FastJSONTests(SimpleTestCase):
+    payload = {
+        'created_at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc),
+        'naive': datetime(2024, 5, 1, 12, 30),
+        'day': date(2024, 5, 1),
+        'time': time(9, 15, 30),
+        'duration': timedelta(hours=1, seconds=5),
+        'price': Decimal('19.90'),
+        'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Featured'),
+        'nested': [{'score': 0.5, 'tags': ('3D', 'Brand'), 'count': 3, 'empty': None}],
+        'text': 'caf\u00e9 \u2028 line \u2029 paragraph',
+        1: 'int key',
+    }
+
+    def test_output_matches_the_stock_renderer(self):
+        fast = FastJSONRenderer().render(self.payload)
+        stock = JSONRenderer().render(self.payload)
+        self.assertEqual(json.loads(fast), json.loads(stock))
+        self.assertIn(b'"2024-05-01T12:30:15.123456Z"', fast)
+        self.assertIn(b'\\u2028', fast)
+        self.assertNotIn('\u2028'.encode(), fast)
+
+    def test_values_orjson_refuses_fall_back_to_the_stock_renderer(self):
+        payload = {'big': 2 ** 70}
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indented_output_uses_the_stock_renderer(self):
+        media_type = 'application/json; indent=2'
+        self.assertEqual(
+            FastJSONRenderer().render(self.payload, media_type), JSONRenderer().render(self.payload, media_type)
+        )
+
+    def parse(self, parser_class, body):
+        return parser_class().parse(io.BytesIO(body), 'application/json', {})
+
+    def test_parser_matches_the_stock_parser(self):
+        body = b'{"name": "caf\xc3\xa9", "values": [1, 2.5, null, true], "big": 123456789012345678901234}'
+        self.assertEqual(self.parse(FastJSONParser, body), self.parse(JSONParser, body))
+        self.assertEqual(self.parse(FastJSONParser, body)['big'], 123456789012345678901234)
+
+    def test_malformed_input_is_a_parse_error(self):
+        for body in (b'{"name": ', b'{name: 1}', b'\xff\xfe', b'[1, 2,]', b'{"a": NaN}'):
+            with self.assertRaises(ParseError, msg=body):
+                self.parse(FastJSONParser, body)
@@ -0,0 +1,153 @@
+"""
+Token-bucket throttling for the public API.
+
+Each client IP has a bucket per scope holding up to N tokens for a rate of
+"N/period" (from `REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`). A request
+takes a token, tokens come back continuously at N per period, and an empty
+bucket answers 429 with a Retry-After of the time until the next token.
+Clients may therefore burst up to N requests, then continue at the rate.
+
+Buckets live in a small SQLite file of their own (`API_THROTTLE_STORE`),
+shared by every worker process on the host and never in the content
+database or the cache. Taking a token is a single UPSERT, so concurrent
+workers cannot both spend the last one.
+"""
+import logging
+import math
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+# Roughly one request in this many also deletes buckets that have refilled
+PRUNE_EVERY = 1000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    allowed INTEGER NOT NULL,
+    full_at REAL NOT NULL
+) WITHOUT ROWID
+'''
+
+# Refill the bucket for the time elapsed, then take a token if there is a
+# whole one. `allowed` records whether the token was taken.
+TAKE = '''
+INSERT INTO buckets (key, tokens, updated, allowed, full_at)
+VALUES (:key, :capacity - 1, :now, 1, :now + 1 / :rate)
+ON CONFLICT (key) DO UPDATE SET
+    allowed = MIN(:capacity, tokens + (:now - updated) * :rate) >= 1,
+    tokens = MIN(:capacity, tokens + (:now - updated) * :rate)
+        - (MIN(:capacity, tokens + (:now - updated) * :rate) >= 1),
+    updated = :now,
+    full_at = :now + (:capacity - MIN(:capacity, tokens + (:now - updated) * :rate)
+        + (MIN(:capacity, tokens + (:now - updated) * :rate) >= 1)) / :rate
+RETURNING allowed, tokens
+'''
+
+
+class TokenBucketStore:
+    """Buckets in a SQLite file, with one connection per thread"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # Autocommit: every statement is its own short transaction
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=wal')
+            # Counters are not worth an fsync per request
+            connection.execute('PRAGMA synchronous=off')
+            connection.execute(SCHEMA)
+            self.local.connection = connection
+        return connection
+
+    def take(self, key, capacity, rate, now=None):
+        """
+        Take a token from the bucket `key` and return `(allowed, tokens
+        left)`. `rate` is in tokens per second.
+        """
+        now = time.time() if now is None else now
+        connection = self.connection()
+        params = {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}
+        allowed, tokens = connection.execute(TAKE, params).fetchall()[0]
+        if random.randrange(PRUNE_EVERY) == 0:
+            connection.execute('DELETE FROM buckets WHERE full_at < ?', (now,))
+        return bool(allowed), tokens
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store():
+    path = str(settings.API_THROTTLE_STORE)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TokenBucketStore(path)
+        return _stores[path]
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Per-IP token bucket for `scope`. When the store cannot be reached the
+    request is let through: throttling must never take the API down.
+    """
+    scope = None
+
+    def get_cache_key(self, request, view):
+        return f'{self.scope}:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        if not getattr(settings, 'API_THROTTLING', True) or self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self.refill_rate = self.num_requests / self.duration
+        try:
+            allowed, self.tokens = get_store().take(key, self.num_requests, self.refill_rate)
+        except sqlite3.Error:
+            logger.warning('Throttle store %s unavailable, not throttling', settings.API_THROTTLE_STORE, exc_info=True)
+            return True
+        return allowed
+
+    def wait(self):
+        """Seconds until the bucket holds a whole token again"""
+        return max(math.ceil((1 - self.tokens) / self.refill_rate), 1)
+
+
+class IPRateThrottle(TokenBucketThrottle):
+    """Overall limit per client IP across every endpoint"""
+    scope = 'ip'
+
+
+class EndpointRateThrottle(TokenBucketThrottle):
+    """
+    Additional limit per client IP for views that set `throttle_scope`, e.g.
+    the contact form or the portfolio listing.
+    """
+
+    def __init__(self):
+        # The scope, and so the rate, is only known once the view is passed
+        # to allow_request
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, 'throttle_scope', None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -4,7 +4,7 @@ from .views import (
     NavigationViewSet, HeroViewSet, ServiceCategoryViewSet, ServiceItemViewSet,
     FeatureViewSet, StatViewSet, TestimonialViewSet, TeamMemberViewSet,
     PortfolioProjectViewSet, AboutContentViewSet, ContactInfoViewSet,
-    ContactFormSubmissionViewSet, FAQViewSet
+    ContactFormSubmissionViewSet, FAQViewSet, SearchView, SiteSnapshotView
 )
 
 router = DefaultRouter()
@@ -23,6 +23,8 @@ router.register(r'contact-form', ContactFormSubmissionViewSet)
 router.register(r'faqs', FAQViewSet)
 
 urlpatterns = [
+    path('site/snapshot/', SiteSnapshotView.as_view(), name='site-snapshot'),
+    path('search/', SearchView.as_view(), name='search'),
     path('', include(router.urls)),
 ]
 
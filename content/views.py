@@ -1,8 +1,10 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.http import HttpResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
-from django.core.cache import cache
 from django.conf import settings
 from .models import (
     Navigation, Hero, ServiceCategory, ServiceItem, Feature, Stat,
@@ -18,39 +20,64 @@ from .serializers import (
     FeaturedTestimonialSerializer, FeaturedTeamMemberSerializer,
     FeaturedPortfolioProjectSerializer
 )
+from .cache import cache_response
+from .mixins import (
+    ConditionalGetMixin, QueryPlanMixin, ReplicaReadMixin, ResponseCacheMixin, apply_query_plan
+)
+from .pagination import (
+    ContactFormSubmissionPagination, KeysetPagination, PortfolioProjectPagination, ServiceItemPagination,
+    featured_limit
+)
+from .search import TYPE_NAMES, search
+from .singletons import get_singleton
+from .snapshot import get_snapshot
+from .spool import spool_submission
+from .tags import filter_by_tags, tag_catalog
 
 
-class NavigationViewSet(viewsets.ModelViewSet):
-    queryset = Navigation.objects.all()
-    serializer_class = NavigationSerializer
-    
+class ContentViewSet(ReplicaReadMixin, ResponseCacheMixin, ConditionalGetMixin, QueryPlanMixin, viewsets.ModelViewSet):
+    """Base viewset for the published content models"""
+
+
+class SingletonContentViewSet(ContentViewSet):
+    """
+    Viewset for a `SingletonModel`. `current` is served from the in-memory
+    copy of the row and creating a second row is rejected.
+    """
+    not_found_message = 'Not found'
+
     @action(detail=False, methods=['get'])
     def current(self, request):
-        """Get the current navigation configuration"""
-        navigation = Navigation.objects.first()
-        if navigation:
-            serializer = self.get_serializer(navigation)
-            return Response(serializer.data)
-        return Response({'message': 'No navigation configuration found'}, status=status.HTTP_404_NOT_FOUND)
+        """Get the current content"""
+        data = get_singleton(self.queryset.model, self.get_serializer_class(), request)
+        if data is None:
+            return Response({'message': self.not_found_message}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    def perform_create(self, serializer):
+        if self.queryset.model.objects.exists():
+            raise ValidationError(
+                f'{self.queryset.model._meta.verbose_name} already exists, edit the existing entry instead'
+            )
+        super().perform_create(serializer)
 
 
-class HeroViewSet(viewsets.ModelViewSet):
+class NavigationViewSet(SingletonContentViewSet):
+    queryset = Navigation.objects.all()
+    serializer_class = NavigationSerializer
+    not_found_message = 'No navigation configuration found'
+
+
+class HeroViewSet(SingletonContentViewSet):
     queryset = Hero.objects.all()
     serializer_class = HeroSerializer
-    
-    @action(detail=False, methods=['get'])
-    def current(self, request):
-        """Get the current hero content"""
-        hero = Hero.objects.first()
-        if hero:
-            serializer = self.get_serializer(hero)
-            return Response(serializer.data)
-        return Response({'message': 'No hero content found'}, status=status.HTTP_404_NOT_FOUND)
+    not_found_message = 'No hero content found'
 
 
-class ServiceCategoryViewSet(viewsets.ModelViewSet):
+class ServiceCategoryViewSet(ContentViewSet):
     queryset = ServiceCategory.objects.all()
     serializer_class = ServiceCategorySerializer
+    conditional_models = [ServiceItem]  # the services action
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -61,12 +88,14 @@ class ServiceCategoryViewSet(viewsets.ModelViewSet):
     def services(self, request, pk=None):
         """Get services for a specific category"""
         category = self.get_object()
-        services = category.services.all()
-        serializer = ServiceItemSerializer(services, many=True)
-        return Response(serializer.data)
+        services = apply_query_plan(category.services.all(), ServiceItemSerializer)
+        paginator = ServiceItemPagination()
+        page = paginator.paginate_queryset(services, request, view=self)
+        serializer = ServiceItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 
-class ServiceItemViewSet(viewsets.ModelViewSet):
+class ServiceItemViewSet(ContentViewSet):
     queryset = ServiceItem.objects.all()
     serializer_class = ServiceItemSerializer
     
@@ -76,37 +105,32 @@ class ServiceItemViewSet(viewsets.ModelViewSet):
         return ServiceItemSerializer
     
     @action(detail=False, methods=['get'])
+    @cache_response('services_featured', depends_on=[ServiceItem, ServiceCategory])
     def featured(self, request):
         """Get featured services only"""
-        featured_services = ServiceItem.objects.filter(is_featured=True)
+        featured_services = self.get_queryset().filter(is_featured=True)[:featured_limit()]
         serializer = self.get_serializer(featured_services, many=True)
         return Response(serializer.data)
 
 
-class FeatureViewSet(viewsets.ModelViewSet):
+class FeatureViewSet(ContentViewSet):
     queryset = Feature.objects.all()
     serializer_class = FeatureSerializer
 
 
-class StatViewSet(viewsets.ModelViewSet):
+class StatViewSet(ContentViewSet):
     queryset = Stat.objects.all()
     serializer_class = StatSerializer
     
+    @cache_response('stats_all', depends_on=[Stat])
     def list(self, request):
         """Get all stats with caching"""
-        cache_key = 'stats_all'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            stats = Stat.objects.all().order_by('order')
-            serializer = self.get_serializer(stats, many=True)
-            cached_data = serializer.data
-            cache.set(cache_key, cached_data, 300)  # Cache for 5 minutes
-        
-        return Response(cached_data)
-
-
-class TestimonialViewSet(viewsets.ModelViewSet):
+        stats = self.get_queryset().order_by('order')
+        serializer = self.get_serializer(stats, many=True)
+        return Response(serializer.data)
+
+
+class TestimonialViewSet(ContentViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
     
@@ -116,21 +140,15 @@ class TestimonialViewSet(viewsets.ModelViewSet):
         return TestimonialSerializer
     
     @action(detail=False, methods=['get'])
+    @cache_response('testimonials_featured', depends_on=[Testimonial])
     def featured(self, request):
         """Get featured testimonials only"""
-        cache_key = 'testimonials_featured'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            featured_testimonials = Testimonial.objects.filter(is_featured=True).order_by('order')
-            serializer = self.get_serializer(featured_testimonials, many=True)
-            cached_data = serializer.data
-            cache.set(cache_key, cached_data, 300)  # Cache for 5 minutes
-        
-        return Response(cached_data)
-
-
-class TeamMemberViewSet(viewsets.ModelViewSet):
+        featured_testimonials = self.get_queryset().filter(is_featured=True).order_by('order')[:featured_limit()]
+        serializer = self.get_serializer(featured_testimonials, many=True)
+        return Response(serializer.data)
+
+
+class TeamMemberViewSet(ContentViewSet):
     queryset = TeamMember.objects.all()
     serializer_class = TeamMemberSerializer
     
@@ -140,24 +158,20 @@ class TeamMemberViewSet(viewsets.ModelViewSet):
         return TeamMemberSerializer
     
     @action(detail=False, methods=['get'])
+    @cache_response('team_featured', depends_on=[TeamMember])
     def featured(self, request):
         """Get featured team members only"""
-        cache_key = 'team_featured'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            featured_members = TeamMember.objects.filter(is_featured=True).order_by('order')
-            serializer = self.get_serializer(featured_members, many=True, context={'request': request})
-            cached_data = serializer.data
-            cache.set(cache_key, cached_data, 300)  # Cache for 5 minutes
-        
-        return Response(cached_data)
-
-
-class PortfolioProjectViewSet(viewsets.ModelViewSet):
+        featured_members = self.get_queryset().filter(is_featured=True).order_by('order')[:featured_limit()]
+        serializer = self.get_serializer(featured_members, many=True, context={'request': request})
+        return Response(serializer.data)
+
+
+class PortfolioProjectViewSet(ContentViewSet):
     queryset = PortfolioProject.objects.all()
     serializer_class = PortfolioProjectSerializer
+    pagination_class = PortfolioProjectPagination
     lookup_field = 'slug'
+    throttle_scope = 'portfolio'
     
     def get_serializer_class(self):
         if self.action == 'featured':
@@ -169,72 +183,80 @@ class PortfolioProjectViewSet(viewsets.ModelViewSet):
         context['request'] = self.request
         return context
     
+    def get_queryset(self):
+        """Apply `?tag=` filters (any tag, or every tag with `?tag_match=all`) to the lists"""
+        queryset = super().get_queryset()
+        tags = self.request.query_params.getlist('tag')
+        if self.action not in ('list', 'by_service') or not tags:
+            return queryset
+        tag_match = self.request.query_params.get('tag_match', 'any')
+        if tag_match not in ('any', 'all'):
+            raise ValidationError({'tag_match': 'Must be "any" or "all"'})
+        return filter_by_tags(queryset, tags, match_all=tag_match == 'all')
+    
     @action(detail=False, methods=['get'])
+    @cache_response('portfolio_tags', depends_on=[PortfolioProject])
+    def tags(self, request):
+        """Get every portfolio tag in use with its number of projects"""
+        return Response(tag_catalog())
+    
+    @action(detail=False, methods=['get'])
+    @cache_response('portfolio_featured', depends_on=[PortfolioProject, ServiceItem])
     def featured(self, request):
         """Get featured portfolio projects only"""
-        featured_projects = PortfolioProject.objects.filter(is_featured=True)
+        featured_projects = self.get_queryset().filter(is_featured=True)[:featured_limit()]
         serializer = self.get_serializer(featured_projects, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'], url_path='by-service/(?P<service_id>[^/.]+)')
     def by_service(self, request, service_id=None):
         """Get portfolio projects for a specific service"""
-        if service_id:
-            projects = PortfolioProject.objects.filter(service_id=service_id)
-            serializer = self.get_serializer(projects, many=True)
-            return Response(serializer.data)
-        return Response({'error': 'Service ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if not service_id:
+            return Response({'error': 'Service ID is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            service_id = int(service_id)
+        except ValueError:
+            service_id = 0
+        # Anything outside the id column's range would fail in the database
+        if not 0 < service_id < 2 ** 63:
+            return Response({'error': 'Service ID must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        projects = self.get_queryset().filter(service_id=service_id)
+        page = self.paginate_queryset(projects)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     @action(detail=True, methods=['get'], url_path='by-slug')
     def by_slug(self, request, slug=None):
         """Get a single portfolio project by slug"""
         try:
-            project = PortfolioProject.objects.get(slug=slug)
+            project = self.get_queryset().get(slug=slug)
             serializer = self.get_serializer(project)
             return Response(serializer.data)
         except PortfolioProject.DoesNotExist:
             return Response({'error': 'Portfolio project not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
-class AboutContentViewSet(viewsets.ModelViewSet):
+class AboutContentViewSet(SingletonContentViewSet):
     queryset = AboutContent.objects.all()
     serializer_class = AboutContentSerializer
-    
-    @action(detail=False, methods=['get'])
-    def current(self, request):
-        """Get the current about content"""
-        cache_key = 'about_current'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            about = AboutContent.objects.first()
-            if about:
-                serializer = self.get_serializer(about)
-                cached_data = serializer.data
-                cache.set(cache_key, cached_data, 300)  # Cache for 5 minutes
-            else:
-                return Response({'message': 'No about content found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        return Response(cached_data)
-
-
-class ContactInfoViewSet(viewsets.ModelViewSet):
+    not_found_message = 'No about content found'
+
+
+class ContactInfoViewSet(SingletonContentViewSet):
     queryset = ContactInfo.objects.all()
     serializer_class = ContactInfoSerializer
-    
-    @action(detail=False, methods=['get'])
-    def current(self, request):
-        """Get the current contact information"""
-        contact_info = ContactInfo.objects.first()
-        if contact_info:
-            serializer = self.get_serializer(contact_info)
-            return Response(serializer.data)
-        return Response({'message': 'No contact information found'}, status=status.HTTP_404_NOT_FOUND)
+    not_found_message = 'No contact information found'
 
 
-class ContactFormSubmissionViewSet(viewsets.ModelViewSet):
+class ContactFormSubmissionViewSet(QueryPlanMixin, viewsets.ModelViewSet):
     queryset = ContactFormSubmission.objects.all()
     serializer_class = ContactFormSubmissionSerializer
+    pagination_class = ContactFormSubmissionPagination
+
+    @property
+    def throttle_scope(self):
+        # Submitting is the action open to spam bots
+        return 'contact_form' if self.action == 'create' else None
     
     def get_permissions(self):
         """
@@ -250,6 +272,13 @@ class ContactFormSubmissionViewSet(viewsets.ModelViewSet):
         """Create a new contact form submission"""
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
+            if settings.CONTACT_SUBMISSIONS_BUFFERED:
+                # Saved later by flush_contact_spool; see content.spool
+                spool_submission(serializer.validated_data)
+                return Response({
+                    'message': 'Thank you for your message! We will get back to you soon.',
+                    'data': serializer.data
+                }, status=status.HTTP_202_ACCEPTED)
             serializer.save()
             return Response({
                 'message': 'Thank you for your message! We will get back to you soon.',
@@ -269,25 +298,72 @@ class ContactFormSubmissionViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get unread contact form submissions"""
-        unread_submissions = ContactFormSubmission.objects.filter(is_read=False)
-        serializer = self.get_serializer(unread_submissions, many=True)
-        return Response(serializer.data)
+        unread_submissions = self.get_queryset().filter(is_read=False)
+        page = self.paginate_queryset(unread_submissions)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
-class FAQViewSet(viewsets.ModelViewSet):
+class FAQViewSet(ContentViewSet):
     queryset = FAQ.objects.all()
     serializer_class = FAQSerializer
     
     @action(detail=False, methods=['get'])
+    @cache_response('faqs_featured', depends_on=[FAQ])
     def featured(self, request):
         """Get featured FAQs only"""
-        cache_key = 'faqs_featured'
-        cached_data = cache.get(cache_key)
-        
-        if cached_data is None:
-            featured_faqs = FAQ.objects.filter(is_featured=True).order_by('order')
-            serializer = self.get_serializer(featured_faqs, many=True)
-            cached_data = serializer.data
-            cache.set(cache_key, cached_data, 300)  # Cache for 5 minutes
-        
-        return Response(cached_data)
\ No newline at end of file
+        featured_faqs = self.get_queryset().filter(is_featured=True).order_by('order')[:featured_limit()]
+        serializer = self.get_serializer(featured_faqs, many=True)
+        return Response(serializer.data)
+
+
+class SiteSnapshotView(APIView):
+    """
+    All homepage content in a single pre-rendered JSON document.
+
+    The document carries a `version` that only changes when content is edited.
+    Clients can send it back as `?since=<version>` (or use the ETag) to get a
+    304 when nothing has changed.
+    """
+
+    def get(self, request):
+        snapshot = get_snapshot(request)
+        if_none_match = request.headers.get('If-None-Match')
+        if request.query_params.get('since') == str(snapshot.version) or if_none_match == snapshot.etag:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(snapshot.payload, content_type='application/json')
+        response['ETag'] = snapshot.etag
+        response['X-Content-Version'] = str(snapshot.version)
+        return response
+
+
+class SearchView(APIView):
+    """
+    Ranked full-text search over portfolio projects, services and FAQs.
+
+    `?q=` is the search text, `?type=` optionally limits the results to a
+    comma-separated list of `portfolio`, `service` and `faq`, and `?limit=`
+    caps the number of results like `page_size` on the paginated lists.
+    """
+    throttle_scope = 'search'
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The q parameter is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        types = [name for name in request.query_params.get('type', '').split(',') if name]
+        unknown = sorted(set(types) - set(TYPE_NAMES))
+        if unknown:
+            return Response(
+                {'error': f'Unknown type: {", ".join(unknown)}. Choose from {", ".join(TYPE_NAMES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            limit = int(request.query_params.get('limit', ''))
+        except ValueError:
+            limit = 0
+        limit = min(limit, KeysetPagination.max_page_size) if limit > 0 else KeysetPagination.page_size
+        return Response({'query': query, 'results': search(query, request, types, limit)})
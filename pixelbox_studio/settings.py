@@ -10,11 +10,18 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Deployment settings (currently the database) can be provided through the
+# environment or a .env file next to manage.py.
+load_dotenv(BASE_DIR / '.env')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -45,6 +52,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'content.middleware.MediaFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -77,13 +86,121 @@ WSGI_APPLICATION = 'pixelbox_studio.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
+# SQLite is used unless DATABASE_ENGINE=postgresql. Connections are kept open
+# per worker for DATABASE_CONN_MAX_AGE seconds and checked before reuse. With
+# PostgreSQL, DATABASE_POOL=true uses a psycopg 3 connection pool instead
+# (Django does not allow pooling together with persistent connections).
+
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASE_POOL = os.environ.get('DATABASE_POOL', 'false').lower() in ('1', 'true', 'yes')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'pixelbox_studio'),
+            'USER': os.environ.get('DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', ''),
+            'PORT': os.environ.get('DATABASE_PORT', ''),
+            'CONN_MAX_AGE': 0 if DATABASE_POOL else int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 1)),
+                    'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE', 4)),
+                    'timeout': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+                },
+            } if DATABASE_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Take the write lock when a transaction starts, so a
+                # transaction that reads then writes waits on busy_timeout
+                # instead of failing with "database is locked"
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
+    }
+
+# Read replicas: a comma separated list of SQLite files or PostgreSQL hosts.
+# Read-only content actions are routed to them by content.routers; SQLite
+# replicas are kept in sync with `manage.py sync_replicas`.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        ('HOST' if DATABASE_ENGINE == 'postgresql' else 'NAME'): replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+# Only read from replicas that hold the current content generation. Disable
+# for replicas kept current by the database itself (streaming replication).
+DATABASE_REPLICA_CHECK_GENERATION = os.environ.get('DATABASE_REPLICA_CHECK_GENERATION', 'true').lower() in ('1', 'true', 'yes')
+
+# Keep a per-thread in-memory SQLite copy of the database in each worker and
+# serve read-only content actions from it (SQLite primary only). The copy is
+# retaken whenever content changes.
+CONTENT_MEMORY_REPLICA = os.environ.get('CONTENT_MEMORY_REPLICA', 'false').lower() in ('1', 'true', 'yes')
+if CONTENT_MEMORY_REPLICA:
+    DATABASES['memory'] = {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': ':memory:',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['content.routers.ReplicaRouter']
+
+# PRAGMAs run on every new SQLite connection (see content/sqlite.py). Set to
+# {} to keep SQLite's defaults.
+SQLITE_PRAGMAS = {
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+# The journal mode is stored in the database file, so it is only set when the
+# deployment asks for it: SQLITE_JOURNAL_MODE=wal lets reads proceed while a
+# contact form submission is being written.
+SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', '')
+if SQLITE_JOURNAL_MODE:
+    SQLITE_PRAGMAS = {'journal_mode': SQLITE_JOURNAL_MODE, **SQLITE_PRAGMAS}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Content responses are cached indefinitely and evicted by model signals, so
+# the cache must be shared by every worker process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
     }
 }
 
+# Seconds to keep cached content responses; None keeps them until the
+# underlying rows change.
+CONTENT_CACHE_TIMEOUT = None
+
+# Hard limits on list responses: the largest page a client may request with
+# ?page_size=, and the most rows a featured action returns.
+CONTENT_MAX_PAGE_SIZE = 100
+CONTENT_FEATURED_LIMIT = 50
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -132,12 +249,39 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'content.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'content.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # Token buckets per client IP, see content/throttling.py. A rate of
+    # "N/period" allows bursts of N requests, refilled at N per period.
+    # `ip` covers every endpoint; the others apply to views with that
+    # `throttle_scope` on top of it.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'content.throttling.IPRateThrottle',
+        'content.throttling.EndpointRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'ip': os.environ.get('API_THROTTLE_RATE', '300/min'),
+        'portfolio': os.environ.get('API_THROTTLE_PORTFOLIO_RATE', '120/min'),
+        'search': os.environ.get('API_THROTTLE_SEARCH_RATE', '60/min'),
+        'contact_form': os.environ.get('API_THROTTLE_CONTACT_FORM_RATE', '10/hour'),
+    },
+    # Client IPs are read from X-Forwarded-For as set by this many proxies;
+    # set API_NUM_PROXIES=1 behind nginx so clients cannot spoof the header
+    'NUM_PROXIES': int(os.environ['API_NUM_PROXIES']) if os.environ.get('API_NUM_PROXIES') else None,
 }
 
+# Throttle buckets are shared by the workers through this SQLite file, kept
+# apart from the content database. API_THROTTLING=false disables throttling.
+API_THROTTLING = os.environ.get('API_THROTTLING', 'true').lower() in ('1', 'true', 'yes')
+API_THROTTLE_STORE = os.environ.get('API_THROTTLE_STORE', BASE_DIR / 'throttle.sqlite3')
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
 "https://pixelboxstudios.in",  
@@ -151,8 +295,44 @@ CORS_ALLOWED_ORIGINS = [
 CORS_ALLOW_CREDENTIALS = True
 
 STATIC_URL = '/static/'
-STATIC_ROOT = '/var/www/pixelbox-backend/staticfiles'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# Static files are served by WhiteNoise. collectstatic writes content-hashed
+# copies plus .gz (and .br, with the Brotli package) variants, and hashed
+# files are sent with a far-future immutable Cache-Control header.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Media files
-MEDIA_ROOT = '/home/ubuntu/pixel-box-studios-backend/media'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', '/home/ubuntu/pixel-box-studios-backend/media')
 MEDIA_URL = '/media/'
+
+# Uploads are served by content.middleware.MediaFilesMiddleware. Their names
+# can be reused after a delete, so they are cached for a limited time and
+# revalidated with ETag/Last-Modified instead of being marked immutable.
+MEDIA_CACHE_MAX_AGE = 60 * 60 * 24
+
+# Responsive image derivatives generated for uploaded images
+IMAGE_DERIVATIVE_WIDTHS = [320, 640, 1024, 1600]
+IMAGE_DERIVATIVE_FORMATS = ['avif', 'webp', 'jpeg']  # avif is skipped if Pillow cannot encode it
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# Media jobs are processed by `manage.py run_media_worker`. Set to True to
+# process them inside the request instead (handy for local development).
+MEDIA_JOBS_INLINE = False
+MEDIA_JOB_RETRY_DELAY = 30  # seconds, doubled after every failed attempt
+MEDIA_JOB_TIMEOUT = 600  # seconds before a running job is assumed dead
+
+# Contact form submissions are written to the database by the request. Set
+# CONTACT_SUBMISSIONS_BUFFERED=true to validate and acknowledge them at once
+# instead: they are appended (and fsynced) to files in CONTACT_SPOOL_DIR and
+# written in batches by `manage.py flush_contact_spool`, so bursts of
+# submissions never hold the SQLite write lock for content reads.
+CONTACT_SUBMISSIONS_BUFFERED = os.environ.get('CONTACT_SUBMISSIONS_BUFFERED', 'false').lower() in ('1', 'true', 'yes')
+CONTACT_SPOOL_DIR = os.environ.get('CONTACT_SPOOL_DIR', BASE_DIR / 'spool' / 'contact')